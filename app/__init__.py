@@ -7,7 +7,7 @@ from flask_caching import Cache
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from .config import Config
-from .models.database import init_db
+from .models.database import close_request_connection
 
 # Initialize Flask extensions
 csrf = CSRFProtect()
@@ -37,9 +37,21 @@ def create_app(config_class=Config):
     app.logger.addHandler(file_handler)
     app.logger.setLevel(app.config['LOG_LEVEL'])
     
-    # Initialize database
-    with app.app_context():
-        init_db()
+    # Write activity logs in batches from a background thread
+    from .utils.logging import activity_log_writer
+    activity_log_writer.init_app(app)
+    
+    # Time every statement and log the slow ones with their plans
+    from .models.query_stats import query_stats
+    query_stats.init_app(app)
+    
+    # Request and pool metrics; registered first so its pool snapshot runs
+    # after the request's connection has been returned
+    from .utils.metrics import init_app as init_metrics
+    init_metrics(app)
+    
+    # Return the request-scoped connection to the pool
+    app.teardown_appcontext(close_request_connection)
     
     # Register blueprints
     from .routes.auth import auth
@@ -47,12 +59,19 @@ def create_app(config_class=Config):
     from .routes.admin import admin
     from .routes.inventory import inventory
     from .routes.billing import billing
+    from .routes.health import health
+    from .routes.metrics import metrics
     
     app.register_blueprint(auth, url_prefix='/auth')
     app.register_blueprint(main, url_prefix='/')
     app.register_blueprint(admin, url_prefix='/admin')
     app.register_blueprint(inventory, url_prefix='/inventory')
     app.register_blueprint(billing, url_prefix='/billing')
+    app.register_blueprint(health, url_prefix='/health')
+    app.register_blueprint(metrics, url_prefix='/metrics')
+    # Probes and scrapes must not eat into the per-client rate limit
+    limiter.exempt(health)
+    limiter.exempt(metrics)
     
     # Error handlers
     @app.errorhandler(404)
@@ -67,4 +86,8 @@ def create_app(config_class=Config):
     def ratelimit_handler(error):
         return render_template('errors/429.html'), 429
     
+    # Register CLI commands
+    from .cli import register_commands
+    register_commands(app)
+    
     return app 
\ No newline at end of file
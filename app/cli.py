@@ -0,0 +1,75 @@
+import click
+from .models.database import get_db
+from .models.datagen import generate
+from .models.query_plans import check_production_plans
+from .models.sales import rebuild_daily_sales
+from .models.schema import migrate, pending_migrations
+
+
+def register_commands(app):
+    """Register the maintenance commands available through ``flask``."""
+
+    @app.cli.command('migrate')
+    @click.option('--status', is_flag=True, help='List pending migrations without applying them.')
+    def migrate_command(status):
+        """Apply pending schema migrations."""
+        with get_db() as conn:
+            if status:
+                pending = pending_migrations(conn)
+                for version, name in pending:
+                    click.echo(f"pending v{version:04d}_{name}")
+                click.echo(f"{len(pending)} pending migration(s)")
+                return
+            applied = migrate(conn, echo=click.echo)
+        click.echo(f"Applied {len(applied)} migration(s)")
+
+    @app.cli.command('check-query-plans')
+    def check_query_plans():
+        """EXPLAIN the production queries and fail if any lost its index.
+
+        Needs a database seeded with generate-data so the plans are realistic.
+        """
+        with get_db() as conn:
+            results = check_production_plans(conn)
+
+        failed = False
+        for name, problems in results:
+            if problems:
+                failed = True
+                click.echo(f"FAIL {name}: {'; '.join(problems)}")
+            else:
+                click.echo(f"ok   {name}")
+        if failed:
+            raise SystemExit(1)
+
+    @app.cli.command('rebuild-daily-sales')
+    @click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']),
+                  help='Only rebuild days from this date (YYYY-MM-DD) on.')
+    def rebuild_daily_sales_command(since):
+        """Recompute the daily_sales rollup from the bills table."""
+        with get_db() as conn:
+            rows = rebuild_daily_sales(conn, since.date() if since else None)
+        click.echo(f"Rebuilt daily_sales: {rows} rows")
+
+    @app.cli.command('generate-data')
+    @click.option('--suppliers', type=int, default=50, show_default=True)
+    @click.option('--products', type=int, default=5000, show_default=True)
+    @click.option('--bills', type=int, default=100000, show_default=True)
+    @click.option('--days', type=int, default=365, show_default=True,
+                  help='Spread bills over this many days up to --end-date.')
+    @click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']),
+                  help='Last bill date (YYYY-MM-DD); defaults to today.')
+    @click.option('--scale', type=float, default=1.0, show_default=True,
+                  help='Multiply every volume, e.g. 10 for ten times the defaults.')
+    @click.option('--seed', type=int, default=42, show_default=True)
+    @click.option('--chunk-size', type=int, default=2000, show_default=True,
+                  help='Rows per multi-row INSERT.')
+    @click.confirmation_option(prompt='Append synthetic suppliers, products and bills to this database?')
+    def generate_data(suppliers, products, bills, days, end_date, scale, seed, chunk_size):
+        """Append a reproducible synthetic dataset for scale testing."""
+        with get_db() as conn:
+            created = generate(conn, int(suppliers * scale), int(products * scale), int(bills * scale),
+                               days, seed, end_date.date() if end_date else None, chunk_size,
+                               echo=click.echo)
+        for table, value in created.items():
+            click.echo(f"{table}: {value}")
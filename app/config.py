@@ -16,14 +16,73 @@ class Config:
         'database': os.environ.get('DB_NAME', 'medical_shop'),
         'port': int(os.environ.get('DB_PORT', 3306)),
         'raise_on_warnings': True,
-        'autocommit': True,
-        'pool_name': 'pharmacy_pool',
-        'pool_size': 5
+        'autocommit': True
     }
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', 30))
     
-    # Cache settings
-    CACHE_TYPE = 'simple'
+    # Read replica for reporting reads; unset DB_REPLICA_HOST to read from the primary
+    DB_REPLICA_CONFIG = dict(DB_CONFIG,
+                             host=os.environ['DB_REPLICA_HOST'],
+                             port=int(os.environ.get('DB_REPLICA_PORT', 3306)),
+                             user=os.environ.get('DB_REPLICA_USER', DB_CONFIG['user']),
+                             password=os.environ.get('DB_REPLICA_PASSWORD', DB_CONFIG['password'])
+                             ) if os.environ.get('DB_REPLICA_HOST') else None
+    DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 5))
+    DB_REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', 5))
+    DB_REPLICA_RETRY_AFTER = float(os.environ.get('DB_REPLICA_RETRY_AFTER', 30))
+    
+    # Run the hot lookups in app/models/statements.py as server-side prepared statements
+    PREPARED_STATEMENTS = os.environ.get('PREPARED_STATEMENTS', '1') == '1'
+    
+    # Query instrumentation; totals per fingerprint are shown on /admin/queries
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', '1') == '1'
+    QUERY_STATS_SLOW_MS = float(os.environ.get('QUERY_STATS_SLOW_MS', 200))
+    # Adds a Server-Timing header with each response's DB time and query count
+    QUERY_STATS_HEADERS = os.environ.get('QUERY_STATS_HEADERS', '0') == '1'
+    QUERY_STATS_DIR = os.environ.get('QUERY_STATS_DIR', os.path.abspath('query_stats'))
+    QUERY_STATS_FLUSH_INTERVAL = float(os.environ.get('QUERY_STATS_FLUSH_INTERVAL', 10))
+    QUERY_STATS_EXPLAIN_INTERVAL = float(os.environ.get('QUERY_STATS_EXPLAIN_INTERVAL', 300))
+    QUERY_STATS_MAX_FINGERPRINTS = int(os.environ.get('QUERY_STATS_MAX_FINGERPRINTS', 500))
+    QUERY_STATS_TOP_N = int(os.environ.get('QUERY_STATS_TOP_N', 50))
+    
+    # Prometheus metrics on /metrics, summed across gunicorn workers via files in METRICS_DIR
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR', os.path.abspath('metrics_data'))
+    
+    # Inventory settings
+    INVENTORY_PAGE_SIZE = int(os.environ.get('INVENTORY_PAGE_SIZE', 50))
+    PRODUCT_IMPORT_CHUNK_SIZE = int(os.environ.get('PRODUCT_IMPORT_CHUNK_SIZE', 500))
+    
+    # Billing settings
+    BILLS_PAGE_SIZE = int(os.environ.get('BILLS_PAGE_SIZE', 50))
+    BILL_EXPORT_CHUNK_SIZE = int(os.environ.get('BILL_EXPORT_CHUNK_SIZE', 500))
+    EXPORT_JOB_DIR = os.environ.get('EXPORT_JOB_DIR', os.path.abspath('exports'))
+    EXPORT_JOB_TTL = int(os.environ.get('EXPORT_JOB_TTL', 3600))
+    EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 1))
+    PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR', os.path.abspath('pdf_cache'))
+    PDF_CACHE_MAX_BYTES = int(os.environ.get('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    
+    # Product search settings
+    PRODUCT_INDEX_ENABLED = os.environ.get('PRODUCT_INDEX_ENABLED', '1') == '1'
+    PRODUCT_INDEX_SYNC_INTERVAL = float(os.environ.get('PRODUCT_INDEX_SYNC_INTERVAL', 2))
+    PRODUCT_INDEX_RELOAD_INTERVAL = float(os.environ.get('PRODUCT_INDEX_RELOAD_INTERVAL', 900))
+    
+    # Cache settings (filesystem so every gunicorn worker shares one cache)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'FileSystemCache')
+    CACHE_DIR = os.environ.get('CACHE_DIR', os.path.abspath('cache'))
     CACHE_DEFAULT_TIMEOUT = 300
+    DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 60))
+    
+    # Activity log settings
+    ACTIVITY_LOG_ASYNC = os.environ.get('ACTIVITY_LOG_ASYNC', '1') == '1'
+    ACTIVITY_LOG_QUEUE_SIZE = int(os.environ.get('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+    ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get('ACTIVITY_LOG_BATCH_SIZE', 100))
+    ACTIVITY_LOG_FLUSH_INTERVAL = float(os.environ.get('ACTIVITY_LOG_FLUSH_INTERVAL', 1.0))
+    ACTIVITY_LOG_PUT_TIMEOUT = float(os.environ.get('ACTIVITY_LOG_PUT_TIMEOUT', 0.05))
     
     # Rate limiting
     RATELIMIT_DEFAULT = "200 per day"
@@ -1,4 +1,5 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import StringField, IntegerField, FloatField, DateField, SelectField, PasswordField, EmailField, BooleanField, TextAreaField, SubmitField
 from wtforms.validators import DataRequired, NumberRange, Email, Length, EqualTo, Optional
 
@@ -18,6 +19,13 @@ class ProductForm(FlaskForm):
                               validators=[Optional()])
     submit = SubmitField('Submit')
 
+class ProductImportForm(FlaskForm):
+    file = FileField('CSV File', validators=[
+        FileRequired(),
+        FileAllowed(['csv'], 'Please upload a CSV file')
+    ])
+    submit = SubmitField('Import')
+
 class SupplierForm(FlaskForm):
     name = StringField('Supplier Name', validators=[DataRequired()])
     contact_person = StringField('Contact Person', validators=[DataRequired()])
@@ -26,6 +34,13 @@ class SupplierForm(FlaskForm):
     address = StringField('Address', validators=[Optional()])
     submit = SubmitField('Submit')
 
+class GoodsReceiptForm(FlaskForm):
+    supplier_id = SelectField('Supplier', coerce=int, validators=[DataRequired(message='Please select a supplier')])
+    invoice_number = StringField('Supplier Invoice No.', validators=[Optional(), Length(max=50)])
+    received_date = DateField('Received Date', validators=[DataRequired()])
+    notes = TextAreaField('Notes', validators=[Optional()])
+    submit = SubmitField('Post Receipt')
+
 class BillingForm(FlaskForm):
     customer_name = StringField('Customer Name', validators=[
         DataRequired(),
@@ -0,0 +1,265 @@
+from datetime import datetime
+
+from .sales import record_sale
+from .statements import fetch_all
+
+
+class CheckoutError(Exception):
+    """Raised when a bill cannot be created from the requested items."""
+
+
+def _placeholders(count):
+    return ', '.join(['%s'] * count)
+
+
+def _merge_items(items):
+    """Collapse the posted line items into {product_id: quantity}."""
+    quantities = {}
+    for item in items:
+        try:
+            product_id = int(item['id'])
+            quantity = int(item['quantity'])
+        except (KeyError, TypeError, ValueError):
+            raise CheckoutError('Invalid bill item')
+        if quantity <= 0:
+            raise CheckoutError(f"Invalid quantity for product {product_id}")
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    if not quantities:
+        raise CheckoutError('Please add at least one product to the bill.')
+    return quantities
+
+
+def create_bill(conn, customer_name, customer_phone, customer_email,
+                payment_method, created_by, items):
+    """Create a bill and its items in one transaction and return the bill id.
+
+    The number of statements is fixed regardless of bill size: the requested
+    products are locked and read with a single ``IN (...) FOR UPDATE``, stock
+    is decremented with one conditional ``UPDATE``, the bill is inserted with
+    its final total and all items go in with one multi-row ``INSERT``.
+    """
+    quantities = _merge_items(items)
+    product_ids = sorted(quantities)
+
+    conn.start_transaction()
+    cursor = conn.cursor(dictionary=True)
+
+    # Lock all requested rows in primary key order to avoid deadlocks
+    rows = fetch_all(conn, 'checkout_products', product_ids, size=len(product_ids))
+    products = {row['id']: row for row in rows}
+
+    for product_id in product_ids:
+        product = products.get(product_id)
+        if not product:
+            raise CheckoutError(f"Product {product_id} not found")
+        if product['quantity'] < quantities[product_id]:
+            raise CheckoutError(f"Insufficient stock for product {product_id}")
+
+    # Decrement every product at once; the WHERE clause re-checks stock so the
+    # statement only touches all rows or the bill is rolled back.
+    case_sql = ' '.join(['WHEN %s THEN %s'] * len(product_ids))
+    case_params = [value for product_id in product_ids
+                   for value in (product_id, quantities[product_id])]
+    cursor.execute(f'''UPDATE products
+                       SET quantity = quantity - (CASE id {case_sql} END)
+                       WHERE id IN ({_placeholders(len(product_ids))})
+                       AND quantity >= (CASE id {case_sql} END)''',
+                   case_params + product_ids + case_params)
+    if cursor.rowcount != len(product_ids):
+        raise CheckoutError('Insufficient stock for one or more products')
+
+    total_amount = sum(products[product_id]['price'] * quantities[product_id]
+                       for product_id in product_ids)
+
+    bill_date = datetime.now()
+    cursor.execute('''INSERT INTO bills
+                (customer_name, customer_phone, customer_email,
+                 total_amount, bill_date, payment_method, created_by)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)''',
+             (customer_name, customer_phone, customer_email, total_amount,
+              bill_date, payment_method, created_by))
+    bill_id = cursor.lastrowid
+
+    item_params = []
+    for product_id in product_ids:
+        product = products[product_id]
+        item_params.extend((bill_id, product_id, quantities[product_id],
+                            product['price'], product['is_scheduled'],
+                            product['schedule_type']))
+    rows_sql = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(product_ids))
+    cursor.execute(f'''INSERT INTO bill_items
+                (bill_id, product_id, quantity, unit_price, is_scheduled, schedule_type)
+                VALUES {rows_sql}''', item_params)
+
+    record_sale(cursor, bill_date, payment_method, total_amount)
+
+    return bill_id
+
+
+def remove_bill(conn, bill_id):
+    """Delete a bill, restoring its stock; return False if it does not exist.
+
+    Stock is restored with one set-based UPDATE and the daily_sales rollup
+    is adjusted in the same transaction.
+    """
+    conn.start_transaction()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute('''SELECT bill_date, payment_method, total_amount
+                    FROM bills WHERE id = %s FOR UPDATE''', (bill_id,))
+    bill = cursor.fetchone()
+    if not bill:
+        return False
+
+    cursor.execute('''UPDATE products p
+                    JOIN (SELECT product_id, SUM(quantity) as quantity
+                          FROM bill_items WHERE bill_id = %s
+                          GROUP BY product_id) bi ON bi.product_id = p.id
+                    SET p.quantity = p.quantity + bi.quantity''', (bill_id,))
+    cursor.execute('DELETE FROM bill_items WHERE bill_id = %s', (bill_id,))
+    cursor.execute('DELETE FROM bills WHERE id = %s', (bill_id,))
+
+    record_sale(cursor, bill['bill_date'], bill['payment_method'],
+                -bill['total_amount'], bills=-1)
+    return True
+
+
+def _keyset(conditions, params, before):
+    """Add the ``(bill_date, id) < before`` keyset condition when paging."""
+    where = list(conditions)
+    where_params = list(params)
+    if before:
+        where.append('(b.bill_date < %s OR (b.bill_date = %s AND b.id < %s))')
+        where_params.extend((before[0], before[0], before[1]))
+    return where, where_params
+
+
+def encode_cursor(bill):
+    """Return the opaque page cursor pointing just past ``bill``."""
+    return f"{bill['bill_date'].strftime('%Y%m%d%H%M%S')}-{bill['id']}"
+
+
+def decode_cursor(cursor):
+    """Parse a page cursor into ``(bill_date, id)``; None if malformed."""
+    try:
+        bill_date, bill_id = cursor.split('-')
+        return datetime.strptime(bill_date, '%Y%m%d%H%M%S'), int(bill_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def list_bills_query(conditions, params, before=None, page_size=50):
+    """Build the SQL and params for one page of the bill list."""
+    where, where_params = _keyset(conditions, params, before)
+    query = '''SELECT b.id, b.customer_name, b.bill_date, b.total_amount,
+                      b.payment_method, u.username as created_by_name
+               FROM bills b
+               LEFT JOIN users u ON b.created_by = u.id'''
+    if where:
+        query += ' WHERE ' + ' AND '.join(where)
+    query += ' ORDER BY b.bill_date DESC, b.id DESC LIMIT %s'
+    # One extra row tells us whether another page follows
+    return query, where_params + [page_size + 1]
+
+
+def list_bills(conn, conditions, params, before=None, page_size=50):
+    """Return one page of bills newest first and the cursor for the next page.
+
+    Pages are addressed by the ``(bill_date, id)`` of the last row shown
+    rather than an offset, so every page is an index range read of
+    ``page_size`` rows however many bills exist.
+    """
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(*list_bills_query(conditions, params, before, page_size))
+    bills = cursor.fetchall()
+
+    next_cursor = None
+    if len(bills) > page_size:
+        bills = bills[:page_size]
+        next_cursor = encode_cursor(bills[-1])
+    return bills, next_cursor
+
+
+def bill_items_query(bill_ids):
+    """Build the SQL and params reading the items of ``bill_ids`` in bill order."""
+    return (f'''SELECT bi.bill_id, bi.quantity, bi.unit_price,
+                       p.name as product_name
+                FROM bill_items bi
+                JOIN products p ON bi.product_id = p.id
+                WHERE bi.bill_id IN ({_placeholders(len(bill_ids))})
+                ORDER BY bi.bill_id, bi.id''', bill_ids)
+
+
+def iter_bills_with_items(conn, conditions, params, chunk_size=500):
+    """Yield bills newest first with their ``items`` attached.
+
+    Bills are read in keyset-paginated chunks of ``chunk_size`` and the items
+    for a whole chunk are fetched with one ``IN`` query, so memory stays
+    bounded by the chunk size and the query count by the number of chunks.
+    """
+    cursor = conn.cursor(dictionary=True)
+    last_seen = None
+    while True:
+        where, where_params = _keyset(conditions, params, last_seen)
+
+        query = '''SELECT b.id, b.customer_name, b.customer_phone, b.customer_email,
+                          b.total_amount, b.bill_date, b.payment_method,
+                          u.username as created_by_name
+                   FROM bills b
+                   LEFT JOIN users u ON b.created_by = u.id'''
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += ' ORDER BY b.bill_date DESC, b.id DESC LIMIT %s'
+        cursor.execute(query, where_params + [chunk_size])
+        bills = cursor.fetchall()
+        if not bills:
+            return
+
+        bill_ids = [bill['id'] for bill in bills]
+        cursor.execute(*bill_items_query(bill_ids))
+        items_by_bill = {bill_id: [] for bill_id in bill_ids}
+        for item in cursor.fetchall():
+            items_by_bill[item['bill_id']].append(item)
+
+        for bill in bills:
+            bill['items'] = items_by_bill[bill['id']]
+            yield bill
+
+        if len(bills) < chunk_size:
+            return
+        last_seen = (bills[-1]['bill_date'], bills[-1]['id'])
+
+
+def iter_bill_item_rows(conn, conditions, params, batch_size=1000):
+    """Yield one row per bill item, newest bill first, straight off the wire.
+
+    Uses a single join over an unbuffered cursor so rows are streamed from
+    MySQL as they are produced instead of being materialized client side.
+    Bills without items yield a single row with NULL item columns.
+    """
+    query = '''SELECT b.id as bill_id, b.bill_date, b.customer_name, b.customer_phone,
+                      b.customer_email, b.payment_method, b.total_amount,
+                      u.username as created_by_name,
+                      bi.product_id, p.name as product_name, bi.quantity, bi.unit_price
+               FROM bills b
+               LEFT JOIN users u ON b.created_by = u.id
+               LEFT JOIN bill_items bi ON bi.bill_id = b.id
+               LEFT JOIN products p ON bi.product_id = p.id'''
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    # Ordering by the bill_date index alone lets MySQL stream without a filesort
+    query += ' ORDER BY b.bill_date DESC, b.id DESC'
+
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    cursor.execute(query, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        # An abandoned download leaves rows on the wire; drain them so the
+        # connection can go back to the pool
+        if conn.unread_result:
+            conn.consume_results()
+        cursor.close()
@@ -1,9 +1,10 @@
 import mysql.connector
 from mysql.connector import Error
-from queue import Queue
-from threading import Lock
-from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from collections import deque
+from contextlib import contextmanager
+from threading import Event, Lock
+import time
+from flask import g, has_request_context
 import os
 import sys
 from pathlib import Path
@@ -16,69 +17,189 @@ if __name__ == '__main__':
     from app.config import Config
 else:
     from app.config import Config
+from app.models.query_stats import InstrumentedConnection, query_stats
+
+class PoolTimeoutError(Error):
+    """Raised when no connection becomes available within the acquire timeout."""
+
+
+class _Waiter:
+    """A thread blocked in get_connection, served in arrival order."""
+    __slots__ = ('event', 'conn', 'may_create')
+
+    def __init__(self):
+        self.event = Event()
+        self.conn = None
+        self.may_create = False
+
 
 class DatabasePool:
-    """Database connection pool implementation."""
-    def __init__(self, max_connections=5):
+    """Database connection pool implementation.
+
+    Holds up to ``max_connections`` connections, plus up to ``max_overflow``
+    extra ones under load that are closed again when returned. Once that
+    cap is reached, callers queue in FIFO order and a returned connection
+    is handed straight to the longest waiter; a caller that waits longer
+    than ``timeout`` gets a PoolTimeoutError. Connections older than
+    ``recycle`` seconds are replaced, and ones idle for more than
+    ``ping_after`` seconds are pinged before being handed out.
+    """
+    def __init__(self, max_connections=5, max_overflow=5, timeout=5, recycle=1800, ping_after=30,
+                 config=None):
+        self.config = config or Config.DB_CONFIG
         self.max_connections = max_connections
-        self.connections = Queue(maxsize=max_connections)
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
         self.lock = Lock()
-        self._fill_pool()
+        self._idle = deque()
+        self._waiters = deque()
+        self._created = {}
+        self._size = 0
+        self._counters = dict.fromkeys(
+            ('checkouts', 'waits', 'timeouts', 'creations', 'discards', 'ping_failures', 'recycles'), 0)
+        self._wait_seconds = 0.0
 
-    def _fill_pool(self):
-        """Initialize the connection pool."""
-        for _ in range(self.max_connections):
-            try:
-                conn = mysql.connector.connect(**Config.DB_CONFIG)
-                self.connections.put(conn)
-            except Error as e:
-                print(f"Error creating database connection: {e}")
+    def _count(self, name):
+        with self.lock:
+            self._counters[name] += 1
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self.config)
+        if query_stats.enabled:
+            conn = InstrumentedConnection(conn)
+        self._created[id(conn)] = time.monotonic()
+        self._count('creations')
+        return conn
+
+    def _close(self, conn):
+        self._created.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _release_slot(self):
+        """Give up a connection slot, passing it on to a waiter if there is one."""
+        with self.lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.may_create = True
+                waiter.event.set()
+            else:
+                self._size -= 1
 
     def get_connection(self):
         """Get a connection from the pool."""
+        waiter = None
+        conn = None
+        with self.lock:
+            self._counters['checkouts'] += 1
+            if self._idle:
+                conn, returned_at = self._idle.pop()
+            elif self._size < self.max_connections + self.max_overflow:
+                self._size += 1
+            else:
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+                self._counters['waits'] += 1
+
+        if waiter is not None:
+            started = time.monotonic()
+            waiter.event.wait(self.timeout)
+            with self.lock:
+                self._wait_seconds += time.monotonic() - started
+                if not waiter.event.is_set():
+                    self._waiters.remove(waiter)
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeoutError(msg=f"No database connection available after {self.timeout}s")
+            conn = waiter.conn
+            returned_at = time.monotonic()
+
         try:
-            return self.connections.get(timeout=5)  # Add timeout to prevent infinite wait
-        except:
-            # If pool is exhausted, create a new connection
+            if conn is None:
+                return self._connect()
+            return self._check(conn, returned_at)
+        except Exception:
+            self._release_slot()
+            raise
+
+    def _check(self, conn, returned_at):
+        """Replace ``conn`` if it is too old or fails a ping; keeps its slot."""
+        now = time.monotonic()
+        if self.recycle and now - self._created.get(id(conn), now) > self.recycle:
+            self._count('recycles')
+            self._close(conn)
+            return self._connect()
+        if now - returned_at > self.ping_after:
             try:
-                conn = mysql.connector.connect(**Config.DB_CONFIG)
-                return conn
-            except Error as e:
-                print(f"Error creating new connection: {e}")
-                raise
+                conn.ping(reconnect=False)
+            except Exception:
+                self._count('ping_failures')
+                self._close(conn)
+                return self._connect()
+        return conn
 
     def return_connection(self, conn):
         """Return a connection to the pool."""
         if conn is None:
             return
         try:
-            if hasattr(conn, 'in_transaction') and not conn.in_transaction:
-                self.connections.put(conn, timeout=1)
-            else:
-                conn.close()
+            if conn.in_transaction:
+                conn.rollback()
         except Exception:
-            try:
-                conn.close()
-            except Exception:
-                pass
+            self._count('discards')
+            self._close(conn)
+            self._release_slot()
+            return
+
+        with self.lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.conn = conn
+                waiter.event.set()
+                return
+            if self._size <= self.max_connections:
+                self._idle.append((conn, time.monotonic()))
+                return
+            # Shrink back once the burst that needed overflow is over
+            self._size -= 1
+        self._close(conn)
 
     def close_all(self):
         """Close all connections in the pool."""
-        while not self.connections.empty():
-            try:
-                conn = self.connections.get_nowait()
-                conn.close()
-            except:
-                pass
+        with self.lock:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn, _ in idle:
+            self._close(conn)
+
+    def stats(self):
+        """Return pool counters and current usage."""
+        with self.lock:
+            stats = dict(self._counters)
+            stats.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'waiting': len(self._waiters),
+                'max_connections': self.max_connections,
+                'max_overflow': self.max_overflow,
+                'wait_seconds': round(self._wait_seconds, 3),
+            })
+        return stats
 
 class DBConnection:
     """Context manager for database connections."""
-    def __init__(self, pool):
-        self.pool = pool
+    def __init__(self, readonly=False):
+        self.readonly = readonly
+        self.pool = None
         self.conn = None
 
     def __enter__(self):
-        self.conn = self.pool.get_connection()
+        self.pool, self.conn = _checkout(self.readonly)
         return self.conn
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -93,135 +214,207 @@ class DBConnection:
             finally:
                 self.pool.return_connection(self.conn)
 
+class RequestConnection:
+    """Context manager sharing one pooled connection across a request.
+
+    The connection is checked out on first use and kept on ``flask.g``;
+    nested blocks reuse it and only the outermost block commits or rolls
+    back. It goes back to the pool in the app context teardown. Read-only
+    blocks get their own replica connection, unless the request already
+    holds a primary one, so a request always reads its own writes.
+    """
+    def __init__(self, readonly=False):
+        self.readonly = readonly
+        self.key = 'db_conn'
+
+    def __enter__(self):
+        if self.readonly and g.get('db_conn') is None:
+            if g.get('db_read_conn') is not None:
+                self.key = 'db_read_conn'
+            else:
+                replica = _replica_connection()
+                if replica is not None:
+                    self.key = 'db_read_conn'
+                    g.db_read_conn = {'pool': replica[0], 'conn': replica[1], 'depth': 0}
+        state = g.get(self.key)
+        if state is None:
+            pool, conn = _checkout()
+            state = {'pool': pool, 'conn': conn, 'depth': 0}
+            setattr(g, self.key, state)
+        state['depth'] += 1
+        return state['conn']
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        state = g.get(self.key)
+        state['depth'] -= 1
+        if state['depth']:
+            return
+        try:
+            if exc_type:
+                state['conn'].rollback()
+            else:
+                state['conn'].commit()
+        except Exception:
+            pass
+
+def close_request_connection(exc=None):
+    """Return the request's connections to their pools; registered as a teardown hook."""
+    for key in ('db_conn', 'db_read_conn'):
+        state = g.pop(key, None)
+        if state is not None:
+            state['pool'].return_connection(state['conn'])
+
 def init_db():
-    """Initialize database and create tables."""
+    """Bring the database schema up to date by applying pending migrations."""
+    from .schema import migrate
     try:
         with get_db() as conn:
-            cursor = conn.cursor()
-            
-            # Create users table
-            try:
-                cursor.execute('''CREATE TABLE IF NOT EXISTS users (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    email VARCHAR(100) UNIQUE NOT NULL,
-                    password VARCHAR(255) NOT NULL,
-                    role ENUM('admin', 'user') NOT NULL DEFAULT 'user',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_login TIMESTAMP NULL
-                )''')
-            except Error as e:
-                if e.errno != 1050:  # Ignore "table already exists" error
-                    raise
-            
-            # Create suppliers table
-            try:
-                cursor.execute('''CREATE TABLE IF NOT EXISTS suppliers (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    contact_person VARCHAR(100),
-                    phone VARCHAR(20),
-                    email VARCHAR(100),
-                    address TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )''')
-            except Error as e:
-                if e.errno != 1050:
-                    raise
-            
-            # Create products table
-            try:
-                cursor.execute('''CREATE TABLE IF NOT EXISTS products (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    description TEXT,
-                    quantity INT NOT NULL DEFAULT 0,
-                    min_quantity INT NOT NULL DEFAULT 10,
-                    price DECIMAL(10,2) NOT NULL,
-                    expiry_date DATE,
-                    supplier_id INT,
-                    is_scheduled BOOLEAN DEFAULT FALSE,
-                    schedule_type ENUM('H', 'H1') NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (supplier_id) REFERENCES suppliers(id)
-                )''')
-            except Error as e:
-                if e.errno != 1050:
-                    raise
-            
-            # Create activity_logs table
-            try:
-                cursor.execute('''CREATE TABLE IF NOT EXISTS activity_logs (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT,
-                    action VARCHAR(50) NOT NULL,
-                    details TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id)
-                )''')
-            except Error as e:
-                if e.errno != 1050:
-                    raise
-            
-            # Create bills table
-            try:
-                cursor.execute('''CREATE TABLE IF NOT EXISTS bills (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    customer_name VARCHAR(100) NOT NULL,
-                    customer_phone VARCHAR(20),
-                    customer_email VARCHAR(100),
-                    total_amount DECIMAL(10,2) NOT NULL,
-                    bill_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    payment_method ENUM('cash', 'card', 'upi') NOT NULL,
-                    created_by INT,
-                    FOREIGN KEY (created_by) REFERENCES users(id)
-                )''')
-            except Error as e:
-                if e.errno != 1050:
-                    raise
-            
-            # Create bill_items table
-            try:
-                cursor.execute('''CREATE TABLE IF NOT EXISTS bill_items (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    bill_id INT,
-                    product_id INT,
-                    quantity INT NOT NULL,
-                    unit_price DECIMAL(10,2) NOT NULL,
-                    is_scheduled BOOLEAN DEFAULT FALSE,
-                    schedule_type ENUM('H', 'H1') NULL,
-                    FOREIGN KEY (bill_id) REFERENCES bills(id),
-                    FOREIGN KEY (product_id) REFERENCES products(id)
-                )''')
-            except Error as e:
-                if e.errno != 1050:
-                    raise
-            
-            # Create default admin user if none exists
-            cursor.execute('SELECT COUNT(*) FROM users WHERE role = "admin"')
-            if cursor.fetchone()[0] == 0:
-                cursor.execute('''INSERT INTO users (username, email, password, role)
-                                VALUES (%s, %s, %s, %s)''',
-                             ('admin', 'admin@example.com', 
-                              generate_password_hash('admin123'), 'admin'))
-            
-            conn.commit()
+            migrate(conn)
             print("Database initialized successfully")
-            
     except Error as e:
         print(f"Error initializing database: {e}")
         raise
+
+# Connection pools, created on first use in each process
+_pools = {}
+_pools_pid = None
+_pool_lock = Lock()
+_replica_state = {'checked_at': 0.0, 'down_until': 0.0, 'lag': None}
+
+def _process_pools():
+    """Return this process's pools, dropping any inherited across fork().
+
+    Inherited connections are not closed, since those sockets still belong
+    to the parent.
+    """
+    global _pools, _pools_pid
+    if _pools_pid != os.getpid():
+        with _pool_lock:
+            if _pools_pid != os.getpid():
+                _pools = {}
+                _replica_state.update(checked_at=0.0, down_until=0.0, lag=None)
+                _pools_pid = os.getpid()
+    return _pools
+
+def _make_pool(name, config):
+    pools = _process_pools()
+    if name not in pools:
+        with _pool_lock:
+            if name not in pools:
+                pools[name] = DatabasePool(Config.DB_POOL_SIZE, Config.DB_POOL_MAX_OVERFLOW,
+                                           Config.DB_POOL_TIMEOUT, Config.DB_POOL_RECYCLE,
+                                           Config.DB_POOL_PING_AFTER, config)
+    return pools[name]
+
+def get_pool():
+    """Return this process's primary connection pool, creating it on first use."""
+    return _make_pool('primary', Config.DB_CONFIG)
+
+def get_replica_pool():
+    """Return this process's replica pool, or None when no replica is configured."""
+    if not Config.DB_REPLICA_CONFIG:
+        return None
+    return _make_pool('replica', Config.DB_REPLICA_CONFIG)
+
+def replica_lag(conn):
+    """Return the replica's lag in seconds, 0 for a stand-in that is not replicating.
+
+    None means replication is configured but broken or stopped.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute('SHOW REPLICA STATUS')
+        column = 'Seconds_Behind_Source'
+    except Error as e:
+        if e.errno != 1064:  # Servers before 8.0.22 only know SHOW SLAVE STATUS
+            raise
+        cursor.execute('SHOW SLAVE STATUS')
+        column = 'Seconds_Behind_Master'
+    rows = cursor.fetchall()
+    if not rows:
+        return 0
+    return rows[0][column]
+
+def _replica_connection():
+    """Check out a replica connection if the replica is usable, else return None.
+
+    A failed connect or a lag check over DB_REPLICA_MAX_LAG sends reads to
+    the primary for DB_REPLICA_RETRY_AFTER seconds.
+    """
+    pool = get_replica_pool()
+    now = time.monotonic()
+    if pool is None or now < _replica_state['down_until']:
+        return None
+    conn = None
+    try:
+        conn = pool.get_connection()
+        if now - _replica_state['checked_at'] >= Config.DB_REPLICA_LAG_CHECK_INTERVAL:
+            lag = replica_lag(conn)
+            _replica_state.update(checked_at=now, lag=lag)
+            if lag is None or lag > Config.DB_REPLICA_MAX_LAG:
+                print(f"Replica lag {lag}s over threshold, reading from primary")
+                pool.return_connection(conn)
+                _replica_state['down_until'] = now + Config.DB_REPLICA_RETRY_AFTER
+                return None
+        return pool, conn
+    except Error as e:
+        print(f"Replica unavailable, reading from primary: {e}")
+        if conn is not None:
+            pool.return_connection(conn)
+        _replica_state['down_until'] = now + Config.DB_REPLICA_RETRY_AFTER
+        return None
+
+def _checkout(readonly=False):
+    """Return ``(pool, connection)``, from the replica for read-only work when usable."""
+    if readonly:
+        replica = _replica_connection()
+        if replica is not None:
+            return replica
+    pool = get_pool()
+    return pool, pool.get_connection()
+
+def replica_status():
+    """Return the replica pool stats and last lag check, or None without a replica."""
+    pool = get_replica_pool()
+    if pool is None:
+        return None
+    return {
+        'pool': pool.stats(),
+        'lag': _replica_state['lag'],
+        'healthy': time.monotonic() >= _replica_state['down_until'],
+    }
+
+@contextmanager
+def warnings_allowed(conn):
+    """Stop ``conn`` raising on warnings for the duration of the block.
+
+    For statements that always come with a note, such as EXPLAIN's 1003
+    with the rewritten query, which raise_on_warnings would turn into an
+    error once the rows are fetched.
+    """
+    raw = getattr(conn, 'raw', conn)
+    raise_on_warnings, get_warnings = raw.raise_on_warnings, raw.get_warnings
+    raw.raise_on_warnings = False
+    raw.get_warnings = False
+    try:
+        yield conn
     finally:
-        if 'conn' in locals():
-            conn.close()
+        raw.raise_on_warnings = raise_on_warnings
+        raw.get_warnings = get_warnings
 
-# Initialize connection pool
-db_pool = DatabasePool()
+def get_db(scoped=True, readonly=False):
+    """Get a database connection from the pool.
 
-def get_db():
-    """Get a database connection from the pool."""
-    return DBConnection(db_pool)
+    Inside a request this is the request's shared connection; pass
+    ``scoped=False`` for a dedicated one, e.g. for a streamed response
+    that keeps an unbuffered result open. ``readonly=True`` marks work
+    that may be served by the replica; anything that writes must not
+    set it.
+    """
+    if scoped and has_request_context():
+        return RequestConnection(readonly)
+    return DBConnection(readonly)
 
 if __name__ == '__main__':
     print("Initializing database...")
-    init_db() 
\ No newline at end of file
+    init_db() 
@@ -0,0 +1,164 @@
+import random
+from bisect import bisect
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
+
+from .sales import rebuild_daily_sales
+
+PREFIXES = ['Para', 'Amox', 'Azith', 'Cefi', 'Dolo', 'Metf', 'Panto', 'Rani', 'Cet', 'Levo',
+            'Ator', 'Amlo', 'Losa', 'Omep', 'Ibu', 'Diclo', 'Mont', 'Vita', 'Glim', 'Telmi']
+SUFFIXES = ['cillin', 'mycin', 'cetamol', 'zole', 'pril', 'sartan', 'statin', 'formin',
+            'tidine', 'profen', 'fenac', 'lukast', 'zine', 'xone', 'cal', 'pride']
+STRENGTHS = ['5', '10', '20', '40', '250', '500', '650', '1000']
+FORMS = ['Tablet', 'Capsule', 'Syrup', 'Injection', 'Drops', 'Cream', 'Ointment', 'Suspension']
+PAYMENT_METHODS = (['cash', 'upi', 'card'], [50, 35, 15])
+ITEMS_PER_BILL = ([1, 2, 3, 4, 5, 6, 8, 12], [30, 25, 18, 10, 7, 5, 3, 2])
+# Share of the day's bills per opening hour, 8:00 to 21:00
+HOURS = (list(range(8, 22)), [2, 5, 8, 9, 8, 7, 6, 5, 6, 8, 10, 11, 9, 6])
+
+
+def _chunks(count, size):
+    for start in range(0, count, size):
+        yield start, min(size, count - start)
+
+
+def _insert(cursor, table, columns, rows):
+    row_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+                   + ', '.join([row_sql] * len(rows)), [value for row in rows for value in row])
+
+
+def _next_id(cursor, table):
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {table}')
+    return cursor.fetchone()[0]
+
+
+def _expiry(rng, today):
+    """Return an expiry date shaped like a pharmacy's shelves.
+
+    Most stock is 6-36 months out, with a tail that expires soon or already
+    has, and a few undated items.
+    """
+    roll = rng.random()
+    if roll < 0.02:
+        return None
+    if roll < 0.05:
+        return today - timedelta(days=rng.randint(1, 180))
+    if roll < 0.12:
+        return today + timedelta(days=rng.randint(0, 30))
+    if roll < 0.25:
+        return today + timedelta(days=rng.randint(31, 180))
+    return today + timedelta(days=rng.randint(181, 1095))
+
+
+def _quantity(rng, min_quantity):
+    roll = rng.random()
+    if roll < 0.05:
+        return 0
+    if roll < 0.15:
+        return rng.randint(1, min_quantity)
+    # Long tail: most lines hold tens of units, fast movers thousands
+    return min(int(rng.lognormvariate(4, 1.2)) + min_quantity + 1, 20000)
+
+
+def generate(conn, suppliers=50, products=5000, bills=100000, days=365, seed=42,
+             end_date=None, chunk_size=2000, echo=print):
+    """Append a synthetic, reproducible dataset and return the new id ranges.
+
+    Rows are written with explicit ids following the current maximum, in
+    multi-row INSERTs of ``chunk_size`` rows, with unique and foreign key
+    checks off for the session. The same seed, volumes and ``end_date``
+    on the same starting data produce the same rows. Bill lines favour a
+    small set of fast-moving products, and bill dates spread over the
+    ``days`` before ``end_date`` along the shop's opening hours. Nothing
+    else may write to these tables while it runs.
+    """
+    rng = random.Random(seed)
+    today = end_date or date.today()
+    cursor = conn.cursor()
+    cursor.execute('SELECT id FROM users ORDER BY id')
+    user_ids = [row[0] for row in cursor.fetchall()]
+    if not user_ids:
+        raise ValueError('Create a user before generating bills')
+
+    cursor.execute('SET SESSION unique_checks = 0, foreign_key_checks = 0')
+    try:
+        first_supplier = _next_id(cursor, 'suppliers')
+        for start, count in _chunks(suppliers, chunk_size):
+            _insert(cursor, 'suppliers', ('id', 'name', 'contact_person', 'phone', 'email', 'address'), [
+                (first_supplier + i, f'{rng.choice(PREFIXES)} Pharma Distributors {i + 1}',
+                 f'Contact {i + 1}', f'9{rng.randrange(10 ** 9):09d}', f'orders{i + 1}@supplier.example',
+                 f'{rng.randint(1, 400)} Market Road') for i in range(start, start + count)])
+        echo(f"suppliers: {suppliers}")
+
+        # Kept for the bill lines: price and schedule of every new product
+        first_product = _next_id(cursor, 'products')
+        prices, schedules = [], []
+        for start, count in _chunks(products, chunk_size):
+            rows = []
+            for i in range(start, start + count):
+                name = (f'{rng.choice(PREFIXES)}{rng.choice(SUFFIXES)} {rng.choice(STRENGTHS)} '
+                        f'{rng.choice(FORMS)}')
+                # The batch number is the product id, so (name, expiry_date) stays unique
+                name = f'{name} B{first_product + i}'
+                price = round(rng.lognormvariate(4, 0.9) + 2, 2)
+                schedule = rng.choices([None, 'H', 'H1'], [88, 9, 3])[0]
+                min_quantity = rng.choice([5, 10, 10, 20, 50])
+                rows.append((first_product + i, name, f'{name} - synthetic catalogue entry',
+                             _quantity(rng, min_quantity), min_quantity, price, _expiry(rng, today),
+                             first_supplier + rng.randrange(suppliers) if suppliers else None,
+                             schedule is not None, schedule))
+                prices.append(price)
+                schedules.append(schedule)
+            _insert(cursor, 'products', ('id', 'name', 'description', 'quantity', 'min_quantity',
+                                         'price', 'expiry_date', 'supplier_id', 'is_scheduled',
+                                         'schedule_type'), rows)
+            echo(f"products: {start + count}/{products}")
+
+        # Zipf-like popularity: the product at rank r sells about 1/r as often
+        popularity = list(accumulate(1 / rank for rank in range(1, products + 1)))
+        ranked = list(range(products))
+        rng.shuffle(ranked)
+        first_bill = _next_id(cursor, 'bills')
+        first_day = today - timedelta(days=days - 1)
+        item_count = 0
+        for start, count in _chunks(bills if products else 0, chunk_size):
+            bill_rows, item_rows = [], []
+            for bill_id in range(first_bill + start, first_bill + start + count):
+                lines = set()
+                for _ in range(rng.choices(*ITEMS_PER_BILL)[0]):
+                    lines.add(ranked[min(bisect(popularity, rng.random() * popularity[-1]),
+                                         products - 1)])
+                total = 0
+                for index in sorted(lines):
+                    quantity = rng.choices([1, 2, 3, 5, 10], [60, 20, 10, 6, 4])[0]
+                    total += quantity * prices[index]
+                    item_rows.append((bill_id, first_product + index, quantity, prices[index],
+                                      schedules[index] is not None, schedules[index]))
+                bill_date = datetime.combine(first_day + timedelta(days=rng.randrange(days)),
+                                             time(rng.choices(*HOURS)[0], rng.randrange(60),
+                                                  rng.randrange(60)))
+                bill_rows.append((bill_id, f'Customer {rng.randrange(1, 50000)}',
+                                  f'9{rng.randrange(10 ** 9):09d}', None, round(total, 2), bill_date,
+                                  rng.choices(*PAYMENT_METHODS)[0], rng.choice(user_ids)))
+            _insert(cursor, 'bills', ('id', 'customer_name', 'customer_phone', 'customer_email',
+                                      'total_amount', 'bill_date', 'payment_method', 'created_by'),
+                    bill_rows)
+            for item_start, item_chunk in _chunks(len(item_rows), chunk_size):
+                _insert(cursor, 'bill_items', ('bill_id', 'product_id', 'quantity', 'unit_price',
+                                               'is_scheduled', 'schedule_type'),
+                        item_rows[item_start:item_start + item_chunk])
+            item_count += len(item_rows)
+            echo(f"bills: {start + count}/{bills} ({item_count} items)")
+    finally:
+        cursor.execute('SET SESSION unique_checks = 1, foreign_key_checks = 1')
+
+    rebuild_daily_sales(conn, first_day)
+    conn.commit()
+    echo("daily_sales rebuilt")
+    return {
+        'suppliers': (first_supplier, first_supplier + suppliers - 1),
+        'products': (first_product, first_product + products - 1),
+        'bills': (first_bill, first_bill + (bills if products else 0) - 1),
+        'bill_items': item_count,
+    }
@@ -0,0 +1,82 @@
+"""Create the original tables and the default admin user."""
+from werkzeug.security import generate_password_hash
+from ..schema import create_table
+
+TABLES = [
+    '''CREATE TABLE IF NOT EXISTS users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        email VARCHAR(100) UNIQUE NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        role ENUM('admin', 'user') NOT NULL DEFAULT 'user',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_login TIMESTAMP NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS suppliers (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        contact_person VARCHAR(100),
+        phone VARCHAR(20),
+        email VARCHAR(100),
+        address TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE IF NOT EXISTS products (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        description TEXT,
+        quantity INT NOT NULL DEFAULT 0,
+        min_quantity INT NOT NULL DEFAULT 10,
+        price DECIMAL(10,2) NOT NULL,
+        expiry_date DATE,
+        supplier_id INT,
+        is_scheduled BOOLEAN DEFAULT FALSE,
+        schedule_type ENUM('H', 'H1') NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (supplier_id) REFERENCES suppliers(id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS activity_logs (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT,
+        action VARCHAR(50) NOT NULL,
+        details TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS bills (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        customer_name VARCHAR(100) NOT NULL,
+        customer_phone VARCHAR(20),
+        customer_email VARCHAR(100),
+        total_amount DECIMAL(10,2) NOT NULL,
+        bill_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        payment_method ENUM('cash', 'card', 'upi') NOT NULL,
+        created_by INT,
+        FOREIGN KEY (created_by) REFERENCES users(id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS bill_items (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        bill_id INT,
+        product_id INT,
+        quantity INT NOT NULL,
+        unit_price DECIMAL(10,2) NOT NULL,
+        is_scheduled BOOLEAN DEFAULT FALSE,
+        schedule_type ENUM('H', 'H1') NULL,
+        FOREIGN KEY (bill_id) REFERENCES bills(id),
+        FOREIGN KEY (product_id) REFERENCES products(id)
+    )''',
+]
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    for statement in TABLES:
+        create_table(cursor, statement)
+
+    # Create default admin user if none exists
+    cursor.execute('SELECT COUNT(*) FROM users WHERE role = "admin"')
+    if cursor.fetchone()[0] == 0:
+        cursor.execute('''INSERT INTO users (username, email, password, role)
+                        VALUES (%s, %s, %s, %s)''',
+                     ('admin', 'admin@example.com',
+                      generate_password_hash('admin123'), 'admin'))
@@ -0,0 +1,6 @@
+"""Index bills.bill_date for the date-filtered and paginated bill list."""
+from ..schema import ensure_index
+
+
+def upgrade(conn):
+    ensure_index(conn.cursor(), 'bills', 'idx_bills_bill_date', 'bill_date')
@@ -0,0 +1,9 @@
+"""Track product changes so the typeahead index can sync deltas."""
+from ..schema import ensure_column, ensure_index
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    ensure_column(cursor, 'products', 'updated_at',
+                  'TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP')
+    ensure_index(cursor, 'products', 'idx_products_updated_at', 'updated_at')
@@ -0,0 +1,16 @@
+"""Add the daily_sales rollup and backfill it from existing bills."""
+from ..sales import rebuild_daily_sales
+from ..schema import create_table
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    create_table(cursor, '''CREATE TABLE IF NOT EXISTS daily_sales (
+        sale_date DATE NOT NULL,
+        payment_method ENUM('cash', 'card', 'upi') NOT NULL,
+        bill_count INT NOT NULL DEFAULT 0,
+        total_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (sale_date, payment_method)
+    )''')
+    rebuild_daily_sales(conn)
+    conn.commit()
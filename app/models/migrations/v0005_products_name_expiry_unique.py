@@ -0,0 +1,50 @@
+"""Key product batches on (name, expiry_date) for the CSV import upsert.
+
+Existing duplicate batches would block the unique key, so they are merged
+first: the lowest id of each (name, expiry_date) keeps its details and
+takes the others' stock and bill lines, and the rest are deleted. Batches
+without an expiry date never conflict and are left alone.
+"""
+from ..schema import ensure_index
+
+
+def _merge_duplicates(conn):
+    cursor = conn.cursor()
+    cursor.execute('''CREATE TEMPORARY TABLE product_merge (
+                        id INT PRIMARY KEY,
+                        keep_id INT NOT NULL
+                    )''')
+    try:
+        conn.start_transaction()
+        cursor.execute('''INSERT INTO product_merge (id, keep_id)
+                        SELECT p.id, k.keep_id
+                        FROM products p
+                        JOIN (SELECT name, expiry_date, MIN(id) as keep_id
+                              FROM products WHERE expiry_date IS NOT NULL
+                              GROUP BY name, expiry_date HAVING COUNT(*) > 1) k
+                          ON p.name = k.name AND p.expiry_date = k.expiry_date
+                        WHERE p.id <> k.keep_id''')
+        merged = cursor.rowcount
+        if merged:
+            cursor.execute('''UPDATE products p
+                            JOIN (SELECT m.keep_id, SUM(d.quantity) as quantity
+                                  FROM product_merge m JOIN products d ON d.id = m.id
+                                  GROUP BY m.keep_id) t ON t.keep_id = p.id
+                            SET p.quantity = p.quantity + t.quantity''')
+            # goods_receipt_items only arrives in v0006, so bill_items is the only reference
+            cursor.execute('''UPDATE bill_items bi JOIN product_merge m ON bi.product_id = m.id
+                            SET bi.product_id = m.keep_id''')
+            cursor.execute('DELETE p FROM products p JOIN product_merge m ON m.id = p.id')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute('DROP TEMPORARY TABLE product_merge')
+    if merged:
+        print(f"Merged {merged} duplicate product batch(es) into their lowest id")
+
+
+def upgrade(conn):
+    _merge_duplicates(conn)
+    ensure_index(conn.cursor(), 'products', 'uq_products_name_expiry', 'name, expiry_date', unique=True)
@@ -0,0 +1,28 @@
+"""Add goods receipts and their lines."""
+from ..schema import create_table
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    create_table(cursor, '''CREATE TABLE IF NOT EXISTS goods_receipts (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        supplier_id INT NOT NULL,
+        invoice_number VARCHAR(50),
+        received_date DATE NOT NULL,
+        total_cost DECIMAL(12,2) NOT NULL DEFAULT 0,
+        notes TEXT,
+        created_by INT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_goods_receipts_received_date (received_date),
+        FOREIGN KEY (supplier_id) REFERENCES suppliers(id),
+        FOREIGN KEY (created_by) REFERENCES users(id)
+    )''')
+    create_table(cursor, '''CREATE TABLE IF NOT EXISTS goods_receipt_items (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        receipt_id INT NOT NULL,
+        product_id INT NOT NULL,
+        quantity INT NOT NULL,
+        unit_cost DECIMAL(10,2) NOT NULL DEFAULT 0,
+        FOREIGN KEY (receipt_id) REFERENCES goods_receipts(id),
+        FOREIGN KEY (product_id) REFERENCES products(id)
+    )''')
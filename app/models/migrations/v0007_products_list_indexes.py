@@ -0,0 +1,9 @@
+"""Indexes behind the inventory list's sorts and scheduled filter."""
+from ..schema import ensure_index
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    ensure_index(cursor, 'products', 'idx_products_name', 'name, id')
+    ensure_index(cursor, 'products', 'idx_products_expiry_date', 'expiry_date')
+    ensure_index(cursor, 'products', 'idx_products_scheduled_name', 'is_scheduled, name')
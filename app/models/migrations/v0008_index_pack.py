@@ -0,0 +1,18 @@
+"""Indexes for the remaining filtered and sorted query shapes.
+
+- products.low_stock mirrors ``quantity <= min_quantity`` as a virtual
+  column, since a comparison between two columns cannot use an index;
+  (low_stock, name, id) serves the low stock filter in name order.
+- activity_logs (user_id, created_at) takes over from the foreign key's
+  own user_id index and returns a user's activity newest first.
+- suppliers (name) serves the supplier list and the product form choices.
+"""
+from ..schema import ensure_column, ensure_index
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    ensure_column(cursor, 'products', 'low_stock', 'BOOLEAN AS (quantity <= min_quantity) VIRTUAL')
+    ensure_index(cursor, 'products', 'idx_products_low_stock_name', 'low_stock, name, id')
+    ensure_index(cursor, 'activity_logs', 'idx_activity_logs_user_created', 'user_id, created_at')
+    ensure_index(cursor, 'suppliers', 'idx_suppliers_name', 'name')
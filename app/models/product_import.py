@@ -0,0 +1,168 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from mysql.connector import Error
+
+REQUIRED_COLUMNS = ('name', 'quantity', 'price', 'expiry_date')
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+MAX_REPORTED_ERRORS = 20
+# Largest value products.price (DECIMAL(10,2)) holds
+MAX_PRICE = Decimal('99999999.99')
+CENT = Decimal('0.01')
+
+
+class ProductImportError(Exception):
+    """Raised when an import file has invalid rows; nothing is written."""
+    def __init__(self, errors):
+        super().__init__('Invalid import file')
+        self.errors = errors
+
+
+def _parse_row(row, supplier_ids):
+    """Validate one CSV row and return the staging-table tuple."""
+    name = (row.get('name') or '').strip()
+    if not name or len(name) > 100:
+        raise ValueError('name is required (max 100 characters)')
+    try:
+        quantity = int(row['quantity'])
+        # Left empty or out of the file, the existing product's value is kept
+        min_quantity = (row.get('min_quantity') or '').strip()
+        min_quantity = int(min_quantity) if min_quantity else None
+        price = Decimal(row['price'])
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValueError('quantity, min_quantity and price must be numbers')
+    if not price.is_finite():
+        raise ValueError('quantity, min_quantity and price must be numbers')
+    if quantity < 0 or (min_quantity or 0) < 0 or price < 0:
+        raise ValueError('quantity, min_quantity and price must not be negative')
+    if price > MAX_PRICE or price != price.quantize(CENT):
+        raise ValueError(f'price must be at most {MAX_PRICE} with no more than 2 decimal places')
+    try:
+        expiry_date = date.fromisoformat((row.get('expiry_date') or '').strip())
+    except ValueError:
+        raise ValueError('expiry_date must be YYYY-MM-DD')
+
+    supplier_id = (row.get('supplier_id') or '').strip()
+    if supplier_id:
+        if not supplier_id.isdigit() or int(supplier_id) not in supplier_ids:
+            raise ValueError(f'unknown supplier_id {supplier_id}')
+        supplier_id = int(supplier_id)
+    else:
+        supplier_id = None
+
+    is_scheduled = (row.get('is_scheduled') or '').strip().lower()
+    is_scheduled = is_scheduled in TRUE_VALUES if is_scheduled else None
+    schedule_type = (row.get('schedule_type') or '').strip().upper() or None
+    if schedule_type not in (None, 'H', 'H1'):
+        raise ValueError('schedule_type must be H or H1')
+
+    return (name, (row.get('description') or '').strip() or None, quantity, min_quantity,
+            price, expiry_date, supplier_id, is_scheduled,
+            None if is_scheduled is False else schedule_type)
+
+
+def import_products(conn, stream, chunk_size=500):
+    """Validate and upsert products from a CSV text stream in one transaction.
+
+    Rows are validated as they are read and staged into a temporary table
+    with multi-row inserts of ``chunk_size``; a single INSERT ... SELECT ...
+    ON DUPLICATE KEY UPDATE then merges them into products on the
+    (name, expiry_date) key, adding the imported quantity to existing stock.
+    Optional columns left empty keep an existing product's value; new
+    products get the column defaults.
+    Returns ``(rows, inserted, updated)``; raises ProductImportError and
+    rolls back if any row is invalid.
+    """
+    reader = csv.DictReader(stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ProductImportError([f"Missing column(s): {', '.join(missing)}"])
+
+    conn.start_transaction()
+    cursor = conn.cursor()
+    cursor.execute('SELECT id FROM suppliers')
+    supplier_ids = {row[0] for row in cursor.fetchall()}
+
+    # Left over on this pooled connection if an earlier import died mid-way
+    try:
+        cursor.execute('DROP TEMPORARY TABLE IF EXISTS product_import')
+    except Error as e:
+        if e.errno != 1051:  # raise_on_warnings turns the "unknown table" note into an error
+            raise
+    cursor.execute('''CREATE TEMPORARY TABLE product_import (
+                        seq INT AUTO_INCREMENT PRIMARY KEY,
+                        name VARCHAR(100) NOT NULL,
+                        description TEXT,
+                        quantity INT NOT NULL,
+                        min_quantity INT,
+                        price DECIMAL(10,2) NOT NULL,
+                        expiry_date DATE NOT NULL,
+                        supplier_id INT,
+                        is_scheduled BOOLEAN,
+                        schedule_type ENUM('H', 'H1') NULL
+                    )''')
+
+    def flush(batch):
+        rows_sql = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s)'] * len(batch))
+        cursor.execute(f'''INSERT INTO product_import
+                    (name, description, quantity, min_quantity, price, expiry_date,
+                     supplier_id, is_scheduled, schedule_type)
+                    VALUES {rows_sql}''', [value for row in batch for value in row])
+
+    errors = []
+    invalid = 0
+    batch = []
+    rows = 0
+    try:
+        # Line 1 is the header
+        for line_number, row in enumerate(reader, start=2):
+            try:
+                parsed = _parse_row(row, supplier_ids)
+            except ValueError as e:
+                invalid += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f"Line {line_number}: {e}")
+                continue
+            rows += 1
+            # After the first bad row only keep validating
+            if not invalid:
+                batch.append(parsed)
+                if len(batch) >= chunk_size:
+                    flush(batch)
+                    batch = []
+        if invalid:
+            if invalid > len(errors):
+                errors.append(f"... and {invalid - len(errors)} more invalid row(s)")
+            raise ProductImportError(errors)
+        if not rows:
+            raise ProductImportError(['The file contains no products.'])
+        if batch:
+            flush(batch)
+
+        # Keys not in products yet are inserted, every other row updates
+        cursor.execute('''SELECT COUNT(DISTINCT pi.name, pi.expiry_date)
+                        FROM product_import pi
+                        LEFT JOIN products p ON p.name = pi.name AND p.expiry_date = pi.expiry_date
+                        WHERE p.id IS NULL''')
+        inserted = cursor.fetchone()[0]
+
+        # Ordered by file position so a repeated key accumulates in order
+        cursor.execute('''INSERT INTO products
+                    (name, description, quantity, min_quantity, price, expiry_date,
+                     supplier_id, is_scheduled, schedule_type)
+                    SELECT name, description, quantity, COALESCE(min_quantity, 10), price,
+                           expiry_date, supplier_id,
+                           COALESCE(is_scheduled, schedule_type IS NOT NULL), schedule_type
+                    FROM product_import ORDER BY seq
+                    ON DUPLICATE KEY UPDATE
+                        quantity = products.quantity + product_import.quantity,
+                        min_quantity = COALESCE(product_import.min_quantity, products.min_quantity),
+                        price = product_import.price,
+                        description = COALESCE(product_import.description, products.description),
+                        supplier_id = COALESCE(product_import.supplier_id, products.supplier_id),
+                        schedule_type = IF(product_import.is_scheduled = FALSE, NULL,
+                                           COALESCE(product_import.schedule_type, products.schedule_type)),
+                        is_scheduled = COALESCE(product_import.is_scheduled, products.is_scheduled)''')
+        return rows, inserted, rows - inserted
+    finally:
+        cursor.execute('DROP TEMPORARY TABLE IF EXISTS product_import')
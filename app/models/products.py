@@ -0,0 +1,108 @@
+import base64
+import json
+from datetime import date
+
+# Each sort is backed by an index ending in the primary key:
+# idx_products_name (name, id) and idx_products_expiry_date (expiry_date, id)
+SORTS = {
+    'name': 'p.name',
+    'expiry': 'p.expiry_date',
+}
+
+FILTERS = {
+    'expired': 'p.expiry_date < CURDATE()',
+    'expiring_soon': 'p.expiry_date >= CURDATE() AND p.expiry_date < DATE_ADD(CURDATE(), INTERVAL 1 MONTH)',
+    # Virtual column for quantity <= min_quantity, indexed with name
+    'low_stock': 'p.low_stock = TRUE',
+    'scheduled': 'p.is_scheduled = TRUE',
+}
+
+# Dashboard count, a range on idx_products_expiry_date
+EXPIRING_SOON_COUNT = f"SELECT COUNT(*) as expiring_soon FROM products p WHERE {FILTERS['expiring_soon']}"
+
+
+def like_prefix(text):
+    """Escape LIKE wildcards so ``text`` only matches as a literal prefix."""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def lookup_products_query(text, limit=10):
+    """Build the SQL and params for a name prefix lookup, in stock or not."""
+    return ('''SELECT id, name, quantity, expiry_date
+               FROM products
+               WHERE name LIKE %s
+               ORDER BY name, expiry_date
+               LIMIT %s''', [like_prefix(text), limit])
+
+
+def encode_cursor(product, sort):
+    """Return the opaque page cursor pointing just past ``product``."""
+    value = product['name'] if sort == 'name' else product['expiry_date']
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps([value, product['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """Parse a page cursor into ``(sort value, id)``; None if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, product_id = json.loads(raw)
+        if sort == 'expiry' and value is not None:
+            value = date.fromisoformat(value)
+        elif sort == 'name' and not isinstance(value, str):
+            return None
+        return value, int(product_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def list_products_query(filter_type=None, search=None, sort='name', after=None, page_size=50):
+    """Build the SQL and params for one page of the inventory list."""
+    column = SORTS.get(sort, SORTS['name'])
+    where = []
+    params = []
+    if filter_type in FILTERS:
+        where.append(FILTERS[filter_type])
+    if search:
+        where.append('p.name LIKE %s')
+        params.append(like_prefix(search))
+    if after:
+        value, product_id = after
+        if value is None:
+            # NULL expiry dates sort first, so everything non-NULL follows
+            where.append(f'(({column} IS NULL AND p.id > %s) OR {column} IS NOT NULL)')
+            params.append(product_id)
+        else:
+            where.append(f'({column} > %s OR ({column} = %s AND p.id > %s))')
+            params.extend((value, value, product_id))
+
+    query = '''SELECT p.id, p.name, p.quantity, p.min_quantity, p.price, p.expiry_date,
+                      p.is_scheduled, p.schedule_type, s.name as supplier_name
+               FROM products p
+               LEFT JOIN suppliers s ON p.supplier_id = s.id'''
+    if where:
+        query += ' WHERE ' + ' AND '.join(where)
+    query += f' ORDER BY {column}, p.id LIMIT %s'
+    # One extra row tells us whether another page follows
+    return query, params + [page_size + 1]
+
+
+def list_products(conn, filter_type=None, search=None, sort='name', after=None, page_size=50):
+    """Return one page of products and the cursor for the next page.
+
+    Search is a name prefix match so it can range-scan the name index, and
+    pages are addressed by the sort key of the last row shown, so a page
+    reads about ``page_size`` index entries however large the catalog is.
+    """
+    sort = sort if sort in SORTS else 'name'
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(*list_products_query(filter_type, search, sort, after, page_size))
+    products = cursor.fetchall()
+
+    next_cursor = None
+    if len(products) > page_size:
+        products = products[:page_size]
+        next_cursor = encode_cursor(products[-1], sort)
+    return products, next_cursor
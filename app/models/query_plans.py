@@ -0,0 +1,141 @@
+from datetime import datetime
+
+from .bills import bill_items_query, list_bills_query
+from .database import warnings_allowed
+from .products import EXPIRING_SOON_COUNT, list_products_query, lookup_products_query
+from .statements import STATEMENTS
+from ..utils.date_filters import bill_date_filter
+from ..utils.product_index import SYNC_QUERY
+from ..utils.supplier_cache import SUPPLIER_CHOICES_QUERY
+
+# Access types that seek the index. A full walk of the index ("index")
+# only passes for the queries in ORDERED_WALKS, which read it for its order.
+SEEK = ('const', 'eq_ref', 'ref', 'range')
+ORDERED_WALKS = {'inventory.index', 'inventory.supplier_choices', 'billing.search_products[sql]'}
+
+# Plans on a near-empty table say nothing about production, so these must
+# hold at least MIN_ROWS rows (``flask generate-data`` seeds them)
+SEEDED_TABLES = ('products', 'bills', 'bill_items')
+MIN_ROWS = 1000
+
+
+def explain(cursor, query, params=()):
+    """Return the EXPLAIN rows for ``query`` as dicts.
+
+    MySQL adds note 1003 to every EXPLAIN, so run it inside
+    ``warnings_allowed`` on a connection that raises on warnings.
+    """
+    cursor.execute('EXPLAIN ' + query, params)
+    return cursor.fetchall()
+
+
+def check_plan(cursor, query, params, table, index, alias=None, access=SEEK):
+    """Return a list of problems with the plan ``query`` gets on ``table``.
+
+    The optimizer must choose ``index`` for the table and read it with one
+    of the ``access`` types. Joined tables must not be fully scanned.
+    """
+    problems = []
+    found = False
+    for row in explain(cursor, query, params):
+        if row['table'] is None and 'const table' in (row['Extra'] or ''):
+            # A unique key lookup found no row, so nothing else was read
+            found = True
+            continue
+        if row['table'] != (alias or table):
+            # <derivedN> and <subqueryN> are materialized, not stored tables
+            if row['type'] == 'ALL' and not (row['table'] or '').startswith('<'):
+                problems.append(f"full scan of joined {row['table']} (rows={row['rows']})")
+            continue
+        found = True
+        if row['key'] != index:
+            problems.append(f"uses {row['key'] or 'no index'} instead of {index} "
+                            f"(type={row['type']}, possible_keys={row['possible_keys']})")
+        elif row['type'] not in access:
+            problems.append(f"{row['type']} access on {index} (rows={row['rows']})")
+    if not found:
+        problems.append(f"{alias or table} does not appear in the plan")
+    return problems
+
+
+def seed_problems(cursor):
+    """Return why the database is too small for its plans to be meaningful."""
+    problems = []
+    for table in SEEDED_TABLES:
+        cursor.execute(f'SELECT COUNT(*) AS count FROM {table}')
+        count = cursor.fetchone()['count']
+        if count < MIN_ROWS:
+            problems.append(f"{table} has {count} rows, need {MIN_ROWS}; seed it with flask generate-data")
+    return problems
+
+
+def production_queries():
+    """Yield ``(name, query, params, table, index, alias)`` for the checked queries."""
+    for filter_type in ('today', 'yesterday', 'this_week', 'this_month', 'this_year', 'custom'):
+        conditions, params = bill_date_filter(filter_type, '2024-01-01', '2024-01-31')
+        query, query_params = list_bills_query(conditions, params)
+        yield f'billing.index[{filter_type}]', query, query_params, 'bills', 'idx_bills_bill_date', 'b'
+
+    query, query_params = list_bills_query([], [], (datetime.now(), 0))
+    yield 'billing.index[page]', query, query_params, 'bills', 'idx_bills_bill_date', 'b'
+
+    yield ('inventory.index', *list_products_query(), 'products', 'idx_products_name', 'p')
+    yield ('inventory.index[search]', *list_products_query(search='para'),
+           'products', 'idx_products_name', 'p')
+    yield ('inventory.index[page]', *list_products_query(after=('Paracetamol', 1)),
+           'products', 'idx_products_name', 'p')
+    yield ('inventory.index[expiry]', *list_products_query(sort='expiry', after=(datetime.now().date(), 1)),
+           'products', 'idx_products_expiry_date', 'p')
+    yield ('inventory.index[expired]', *list_products_query('expired', sort='expiry'),
+           'products', 'idx_products_expiry_date', 'p')
+    yield ('inventory.index[scheduled]', *list_products_query('scheduled'),
+           'products', 'idx_products_scheduled_name', 'p')
+    yield ('inventory.index[low_stock]', *list_products_query('low_stock'),
+           'products', 'idx_products_low_stock_name', 'p')
+    yield ('inventory.index[expiring_soon]', *list_products_query('expiring_soon', sort='expiry'),
+           'products', 'idx_products_expiry_date', 'p')
+    yield ('inventory.lookup_products', *lookup_products_query('para'),
+           'products', 'uq_products_name_expiry', None)
+    yield ('inventory.supplier_choices', SUPPLIER_CHOICES_QUERY, (), 'suppliers', 'idx_suppliers_name', None)
+    yield ('product_index.sync', SYNC_QUERY, (datetime.now(),), 'products', 'idx_products_updated_at', None)
+
+    yield ('auth.login', STATEMENTS['user_by_username'], ('admin',), 'users', 'username', None)
+    yield ('billing.view_bill[bill]', STATEMENTS['bill_by_id'], (1,), 'bills', 'PRIMARY', 'b')
+    yield ('billing.view_bill[items]', STATEMENTS['bill_items_by_bill'], (1,), 'bill_items', 'bill_id', 'bi')
+    yield ('billing.new_bill[lock]', STATEMENTS['checkout_products'].format(ids='%s, %s, %s'), (1, 2, 3),
+           'products', 'PRIMARY', None)
+    # A contains search cannot seek; it walks the name index until 10 rows match
+    yield ('billing.search_products[sql]', STATEMENTS['product_search'], ('%para%',),
+           'products', 'idx_products_name', None)
+    yield ('billing.export[items]', *bill_items_query([1, 2, 3]), 'bill_items', 'bill_id', 'bi')
+    yield ('admin.delete_user[activity]', 'DELETE FROM activity_logs WHERE user_id = %s', (1,),
+           'activity_logs', 'idx_activity_logs_user_created', None)
+
+    yield ('main.index[expiring_soon]', EXPIRING_SOON_COUNT, (), 'products', 'idx_products_expiry_date', 'p')
+    yield ('main.index[today_sales]',
+           'SELECT payment_method, bill_count, total_amount FROM daily_sales WHERE sale_date = %s',
+           (datetime.now().date(),), 'daily_sales', 'PRIMARY', None)
+
+
+def check_production_plans(conn):
+    """Run EXPLAIN on every production query; return ``[(name, problems)]``.
+
+    Refuses to judge plans on an unseeded database, and refreshes the
+    table statistics first so the optimizer sees the rows actually there.
+    """
+    cursor = conn.cursor(dictionary=True)
+    problems = seed_problems(cursor)
+    if problems:
+        return [('seed', problems)]
+    queries = list(production_queries())
+    for table in sorted({table for _, _, _, table, _, _ in queries}):
+        cursor.execute(f'ANALYZE TABLE {table}')
+        cursor.fetchall()
+    with warnings_allowed(conn):
+        return [(name, check_plan(cursor, query, params, table, index, alias, access_types(name)))
+                for name, query, params, table, index, alias in queries]
+
+
+def access_types(name):
+    """Return the access types the production query ``name`` may use."""
+    return SEEK + ('index',) if name in ORDERED_WALKS else SEEK
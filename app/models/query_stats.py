@@ -0,0 +1,283 @@
+import atexit
+import glob
+import json
+import os
+import re
+import time
+from threading import Lock
+from flask import current_app, g, has_request_context, request
+
+# Literals and placeholders collapse to ``?`` so one query shape is one fingerprint
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_ROWS = re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+')
+_SPACE = re.compile(r'\s+')
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|UPDATE|DELETE|INSERT)\b', re.I)
+
+
+def fingerprint(sql):
+    """Normalize a statement so calls differing only in values group together."""
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', 'replace')
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _ROWS.sub(r'\1, ...', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times each ``execute`` and reports it to query_stats.
+
+    Only the execute call is timed; rows fetched later from an unbuffered
+    cursor are not included.
+    """
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _timed(self, method, operation, args, kwargs):
+        started = time.perf_counter()
+        try:
+            return method(operation, *args, **kwargs)
+        finally:
+            query_stats.record(operation, args[0] if args else kwargs.get('params'),
+                               time.perf_counter() - started)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, args, kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, args, kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are InstrumentedCursors.
+
+    The pool wraps each connection once when it is opened, so anything
+    keyed on the connection object (prepared statements) stays valid for
+    its lifetime. ``raw`` is the underlying connection.
+    """
+    def __init__(self, conn):
+        self.raw = conn
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.raw.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class QueryStats:
+    """Per-request query counters and per-process fingerprint aggregates.
+
+    Each request records its query count, total DB time and slowest
+    statement. Statements slower than ``slow_ms`` are logged at the end of
+    the request with an EXPLAIN of their plan, at most once per
+    ``explain_interval`` seconds for each fingerprint. Each worker process
+    writes its fingerprint totals to ``<dir>/queries-<pid>.json`` every
+    ``flush_interval`` seconds so the admin page can merge all workers.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = 200
+        self.headers = False
+        self.directory = None
+        self.flush_interval = 10
+        self.explain_interval = 300
+        self.max_fingerprints = 500
+        self._lock = Lock()
+        self._fingerprints = {}
+        self._explained = {}
+        self._flushed_at = 0.0
+        self._reset_seen = 0.0
+        self._pid = None
+
+    def init_app(self, app):
+        self.enabled = app.config['QUERY_STATS_ENABLED']
+        self.slow_ms = app.config['QUERY_STATS_SLOW_MS']
+        self.headers = app.config['QUERY_STATS_HEADERS']
+        self.directory = app.config['QUERY_STATS_DIR']
+        self.flush_interval = app.config['QUERY_STATS_FLUSH_INTERVAL']
+        self.explain_interval = app.config['QUERY_STATS_EXPLAIN_INTERVAL']
+        self.max_fingerprints = app.config['QUERY_STATS_MAX_FINGERPRINTS']
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._start_request)
+        app.after_request(self._add_headers)
+        app.teardown_request(self._finish_request)
+        atexit.register(self.flush)
+
+    def _process_state(self):
+        # Totals inherited across fork() belong to the parent's file
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._fingerprints = {}
+                    self._explained = {}
+                    self._flushed_at = time.monotonic()
+                    self._pid = os.getpid()
+
+    def record(self, sql, params, seconds):
+        """Add one executed statement to the process and request totals."""
+        self._process_state()
+        key = fingerprint(sql)
+        with self._lock:
+            entry = self._fingerprints.get(key)
+            if entry is None:
+                if len(self._fingerprints) >= self.max_fingerprints:
+                    key = '(other)'
+                    entry = self._fingerprints.get(key)
+                if entry is None:
+                    entry = self._fingerprints[key] = {
+                        'count': 0, 'total': 0.0, 'max': 0.0, 'slow': 0, 'plan': None}
+            entry['count'] += 1
+            entry['total'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+
+        if not has_request_context() or g.get('query_stats') is None:
+            return
+        stats = g.query_stats
+        stats['count'] += 1
+        stats['seconds'] += seconds
+        if stats['slowest'] is None or seconds > stats['slowest'][0]:
+            stats['slowest'] = (seconds, key)
+        if seconds * 1000 >= self.slow_ms:
+            stats['slow'].append((seconds, key, sql, params))
+
+    def _start_request(self):
+        g.query_stats = {'count': 0, 'seconds': 0.0, 'slowest': None, 'slow': []}
+
+    def _add_headers(self, response):
+        stats = g.get('query_stats')
+        if self.headers and stats is not None:
+            response.headers['Server-Timing'] = (
+                f'db;dur={stats["seconds"] * 1000:.1f};desc="{stats["count"]} queries"')
+        return response
+
+    def _finish_request(self, exc=None):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return
+        if stats['count']:
+            slowest = stats['slowest']
+            current_app.logger.debug(
+                f"{request.method} {request.path}: {stats['count']} queries in "
+                f"{stats['seconds'] * 1000:.1f}ms, slowest {slowest[0] * 1000:.1f}ms {slowest[1][:200]}")
+        for seconds, key, sql, params in stats['slow']:
+            plan = self._explain(key, sql, params)
+            current_app.logger.warning(
+                f"Slow query {seconds * 1000:.1f}ms on {request.method} {request.path}: {key}"
+                + (f"\n  plan: {json.dumps(plan, default=str)}" if plan else ''))
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def _explain(self, key, sql, params):
+        """Count a slow statement and EXPLAIN it unless it was explained recently."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._fingerprints.get(key)
+            if entry is not None:
+                entry['slow'] += 1
+            if now - self._explained.get(key, -self.explain_interval) < self.explain_interval:
+                return None
+            self._explained[key] = now
+        if isinstance(sql, (bytes, bytearray)):
+            sql = sql.decode('utf-8', 'replace')
+        if not _EXPLAINABLE.match(sql):
+            return None
+
+        from .database import get_db, warnings_allowed
+        try:
+            # Straight to the driver, so the EXPLAIN is not counted itself;
+            # its note 1003 would raise under raise_on_warnings
+            with get_db(scoped=False) as conn, warnings_allowed(getattr(conn, 'raw', conn)) as raw:
+                cursor = raw.cursor(dictionary=True)
+                cursor.execute(f'EXPLAIN {sql}', params or ())
+                plan = [{column: row.get(column) for column in
+                         ('table', 'type', 'possible_keys', 'key', 'rows', 'filtered', 'Extra')}
+                        for row in cursor.fetchall()]
+        except Exception as e:
+            current_app.logger.warning(f"Could not explain slow query {key[:200]}: {e}")
+            return None
+        with self._lock:
+            if key in self._fingerprints:
+                self._fingerprints[key]['plan'] = plan
+        return plan
+
+    def _path(self, pid=None):
+        return os.path.join(self.directory, f'queries-{pid or os.getpid()}.json')
+
+    def flush(self):
+        """Write this process's fingerprint totals to its stats file."""
+        if not self.enabled or self._pid != os.getpid():
+            return
+        marker = os.path.join(self.directory, 'reset')
+        try:
+            reset_at = os.path.getmtime(marker)
+        except OSError:
+            reset_at = 0.0
+        with self._lock:
+            if reset_at > self._reset_seen:
+                # An admin cleared the totals since the last write
+                self._fingerprints = {}
+                self._explained = {}
+                self._reset_seen = reset_at
+            snapshot = {'pid': os.getpid(), 'updated_at': time.time(),
+                        'fingerprints': {key: dict(entry) for key, entry in self._fingerprints.items()}}
+            self._flushed_at = time.monotonic()
+        path = self._path()
+        try:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            print(f"Error writing query stats: {e}")
+
+    def reset(self):
+        """Clear the totals of every worker; each one drops its own on its next write."""
+        with open(os.path.join(self.directory, 'reset'), 'w'):
+            pass
+        for path in glob.glob(os.path.join(self.directory, 'queries-*.json')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.flush()
+
+    def top(self, limit=50, sort='total'):
+        """Merge all workers' stats files and return the top fingerprints by ``sort``."""
+        self.flush()
+        merged = {}
+        workers = 0
+        for path in glob.glob(os.path.join(self.directory, 'queries-*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            workers += 1
+            for key, entry in snapshot['fingerprints'].items():
+                total = merged.setdefault(key, {'sql': key, 'count': 0, 'total': 0.0, 'max': 0.0,
+                                                'slow': 0, 'plan': None})
+                total['count'] += entry['count']
+                total['total'] += entry['total']
+                total['max'] = max(total['max'], entry['max'])
+                total['slow'] += entry['slow']
+                total['plan'] = entry['plan'] or total['plan']
+        for entry in merged.values():
+            entry['avg'] = entry['total'] / entry['count'] if entry['count'] else 0.0
+        key = sort if sort in ('total', 'count', 'max', 'avg', 'slow') else 'total'
+        return sorted(merged.values(), key=lambda entry: entry[key], reverse=True)[:limit], workers
+
+
+query_stats = QueryStats()
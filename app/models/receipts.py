@@ -0,0 +1,93 @@
+from decimal import Decimal, InvalidOperation
+
+# Largest values goods_receipt_items.unit_cost (DECIMAL(10,2)) and
+# goods_receipts.total_cost (DECIMAL(12,2)) hold
+MAX_UNIT_COST = Decimal('99999999.99')
+MAX_TOTAL_COST = Decimal('9999999999.99')
+CENT = Decimal('0.01')
+
+
+class ReceiptError(Exception):
+    """Raised when a goods receipt cannot be posted from the submitted lines."""
+
+
+def _placeholders(count):
+    return ', '.join(['%s'] * count)
+
+
+def _parse_lines(items):
+    """Validate the posted receipt lines into (product_id, quantity, unit_cost) tuples."""
+    lines = []
+    for item in items:
+        try:
+            product_id = int(item['id'])
+            quantity = int(item['quantity'])
+            unit_cost = Decimal(str(item.get('unit_cost') or 0))
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            raise ReceiptError('Invalid receipt line')
+        if quantity <= 0:
+            raise ReceiptError(f"Invalid quantity for product {product_id}")
+        if (not unit_cost.is_finite() or unit_cost < 0 or unit_cost > MAX_UNIT_COST
+                or unit_cost != unit_cost.quantize(CENT)):
+            raise ReceiptError(f"Invalid unit cost for product {product_id}")
+        lines.append((product_id, quantity, unit_cost))
+    if not lines:
+        raise ReceiptError('Please add at least one product to the receipt.')
+    return lines
+
+
+def create_receipt(conn, supplier_id, invoice_number, received_date, notes, created_by, items):
+    """Post a goods receipt and add its quantities to stock; return the receipt id.
+
+    Everything happens in one transaction with a fixed number of statements:
+    the receipt header, one multi-row insert for its lines and one ``UPDATE``
+    that applies every increment as ``quantity = quantity + n``. The stock
+    update runs last so product rows stay locked only until the commit, and
+    being relative it never overwrites a concurrent billing decrement.
+    """
+    lines = _parse_lines(items)
+    increments = {}
+    for product_id, quantity, _ in lines:
+        increments[product_id] = increments.get(product_id, 0) + quantity
+    product_ids = sorted(increments)
+
+    conn.start_transaction()
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT id FROM suppliers WHERE id = %s', (supplier_id,))
+    if not cursor.fetchall():
+        raise ReceiptError('Supplier not found')
+    cursor.execute(f'SELECT id FROM products WHERE id IN ({_placeholders(len(product_ids))})',
+                   product_ids)
+    missing = set(product_ids) - {row[0] for row in cursor.fetchall()}
+    if missing:
+        raise ReceiptError(f"Product {min(missing)} not found")
+
+    total_cost = sum(quantity * unit_cost for _, quantity, unit_cost in lines)
+    if total_cost > MAX_TOTAL_COST:
+        raise ReceiptError('The receipt total is too large')
+    cursor.execute('''INSERT INTO goods_receipts
+                (supplier_id, invoice_number, received_date, total_cost, notes, created_by)
+                VALUES (%s, %s, %s, %s, %s, %s)''',
+             (supplier_id, invoice_number or None, received_date, total_cost,
+              notes or None, created_by))
+    receipt_id = cursor.lastrowid
+
+    rows_sql = ', '.join(['(%s, %s, %s, %s)'] * len(lines))
+    cursor.execute(f'''INSERT INTO goods_receipt_items
+                (receipt_id, product_id, quantity, unit_cost)
+                VALUES {rows_sql}''',
+             [value for line in lines for value in (receipt_id,) + line])
+
+    case_sql = ' '.join(['WHEN %s THEN %s'] * len(product_ids))
+    case_params = [value for product_id in product_ids
+                   for value in (product_id, increments[product_id])]
+    cursor.execute(f'''UPDATE products
+                       SET quantity = quantity + (CASE id {case_sql} END)
+                       WHERE id IN ({_placeholders(len(product_ids))})''',
+                   case_params + product_ids)
+    if cursor.rowcount != len(product_ids):
+        # A product was deleted after it was checked above
+        raise ReceiptError('One or more products no longer exist')
+
+    return receipt_id
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+PAYMENT_METHODS = ('cash', 'card', 'upi')
+
+
+def record_sale(cursor, bill_date, payment_method, amount, bills=1):
+    """Add a bill to the daily_sales rollup (negative values remove one).
+
+    Must run in the same transaction as the bill insert or delete so the
+    rollup never drifts from the bills table.
+    """
+    cursor.execute('''INSERT INTO daily_sales (sale_date, payment_method, bill_count, total_amount)
+                    VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE bill_count = bill_count + %s,
+                                            total_amount = total_amount + %s''',
+                   (bill_date.date(), payment_method, bills, amount, bills, amount))
+
+
+def sales_summary(conn, day):
+    """Return the bill count and totals per payment method for ``day``."""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute('''SELECT payment_method, bill_count, total_amount
+                    FROM daily_sales WHERE sale_date = %s''', (day,))
+    summary = {'total_sales': Decimal('0'), 'total_bills': 0}
+    for method in PAYMENT_METHODS:
+        summary[f'{method}_sales'] = Decimal('0')
+    for row in cursor.fetchall():
+        summary[f"{row['payment_method']}_sales"] = row['total_amount']
+        summary['total_sales'] += row['total_amount']
+        summary['total_bills'] += row['bill_count']
+    return summary
+
+
+def rebuild_daily_sales(conn, since=None):
+    """Recompute the rollup from bills, for every day or from ``since`` on."""
+    conn.start_transaction()
+    cursor = conn.cursor()
+    if since:
+        cursor.execute('DELETE FROM daily_sales WHERE sale_date >= %s', (since,))
+        where, params = 'WHERE bill_date >= %s', (since,)
+    else:
+        cursor.execute('DELETE FROM daily_sales')
+        where, params = '', ()
+    cursor.execute(f'''INSERT INTO daily_sales (sale_date, payment_method, bill_count, total_amount)
+                     SELECT DATE(bill_date), payment_method, COUNT(*), SUM(total_amount)
+                     FROM bills {where}
+                     GROUP BY DATE(bill_date), payment_method''', params)
+    return cursor.rowcount
@@ -0,0 +1,116 @@
+import importlib
+import os
+import re
+from mysql.connector import Error
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+MIGRATION_FILE = re.compile(r'^v(\d{4})_(\w+)\.py$')
+# Serializes concurrent runs, e.g. several containers starting at once
+MIGRATION_LOCK = 'schema_migrations'
+
+
+def create_table(cursor, statement):
+    """Run a CREATE TABLE IF NOT EXISTS, ignoring the "already exists" note.
+
+    raise_on_warnings turns that note into error 1050.
+    """
+    try:
+        cursor.execute(statement)
+    except Error as e:
+        if e.errno != 1050:
+            raise
+
+
+def ensure_column(cursor, table, name, definition):
+    """Add a column unless a table created earlier already has it."""
+    cursor.execute('''SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+                    LIMIT 1''', (table, name))
+    if not cursor.fetchall():
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+
+def ensure_index(cursor, table, name, columns, unique=False):
+    """Create an index unless a table created earlier already has it."""
+    cursor.execute('''SELECT 1 FROM information_schema.statistics
+                    WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+                    LIMIT 1''', (table, name))
+    if not cursor.fetchall():
+        if unique:
+            _check_duplicates(cursor, table, name, columns)
+        cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({columns})")
+
+
+def _check_duplicates(cursor, table, name, columns, limit=20):
+    """Fail with the offending keys when existing rows would block a unique index.
+
+    Rows with a NULL in any key column never conflict, so they are skipped.
+    """
+    not_null = ' AND '.join(f'{column.strip()} IS NOT NULL' for column in columns.split(','))
+    cursor.execute(f'''SELECT {columns}, COUNT(*) FROM {table} WHERE {not_null}
+                     GROUP BY {columns} HAVING COUNT(*) > 1
+                     ORDER BY {columns} LIMIT {limit + 1}''')
+    duplicates = cursor.fetchall()
+    if duplicates:
+        listed = '\n'.join(f"  ({', '.join(str(value) for value in row[:-1])}): {row[-1]} rows"
+                           for row in duplicates[:limit])
+        more = '\n  ...' if len(duplicates) > limit else ''
+        raise RuntimeError(f"Cannot create unique index {name} on {table} ({columns}); "
+                           f"merge or delete these duplicate rows, then run flask migrate again:\n"
+                           f"{listed}{more}")
+
+
+def available_migrations():
+    """Return ``[(version, name)]`` for the migration scripts, in order."""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2)))
+    return sorted(migrations)
+
+
+def applied_versions(conn):
+    """Return the set of migration versions recorded in schema_version."""
+    cursor = conn.cursor()
+    create_table(cursor, '''CREATE TABLE IF NOT EXISTS schema_version (
+                        version INT PRIMARY KEY,
+                        name VARCHAR(100) NOT NULL,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )''')
+    cursor.execute('SELECT version FROM schema_version')
+    return {row[0] for row in cursor.fetchall()}
+
+
+def pending_migrations(conn):
+    """Return ``[(version, name)]`` for migrations not applied yet."""
+    applied = applied_versions(conn)
+    return [migration for migration in available_migrations() if migration[0] not in applied]
+
+
+def migrate(conn, echo=print):
+    """Apply pending migrations in version order; return the ones applied.
+
+    Each script's ``upgrade(conn)`` runs once and is recorded in
+    schema_version straight after, so a failed run resumes at the failed
+    script. MySQL commits DDL implicitly, which is why scripts are written
+    to be safe to re-run.
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT GET_LOCK(%s, 60)', (MIGRATION_LOCK,))
+    if cursor.fetchone()[0] != 1:
+        raise RuntimeError('Another migration run holds the schema lock')
+    try:
+        applied = []
+        for version, name in pending_migrations(conn):
+            echo(f"Applying v{version:04d}_{name}")
+            module = importlib.import_module(f'{__package__}.migrations.v{version:04d}_{name}')
+            module.upgrade(conn)
+            cursor.execute('INSERT INTO schema_version (version, name) VALUES (%s, %s)',
+                           (version, name))
+            conn.commit()
+            applied.append((version, name))
+        return applied
+    finally:
+        cursor.execute('SELECT RELEASE_LOCK(%s)', (MIGRATION_LOCK,))
+        cursor.fetchall()
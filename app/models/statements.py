@@ -0,0 +1,89 @@
+import weakref
+from collections import OrderedDict
+from app.config import Config
+
+# Hot parameterized queries run through server-side prepared statements.
+# ``{ids}`` expands to one placeholder per value; each size is its own statement.
+STATEMENTS = {
+    'user_by_username': 'SELECT id, username, password, role FROM users WHERE username = %s',
+    'bill_by_id': '''SELECT b.*, u.username as created_by_name
+                     FROM bills b
+                     LEFT JOIN users u ON b.created_by = u.id
+                     WHERE b.id = %s''',
+    'bill_items_by_bill': '''SELECT bi.*, p.name as product_name
+                             FROM bill_items bi
+                             JOIN products p ON bi.product_id = p.id
+                             WHERE bi.bill_id = %s''',
+    'product_search': '''SELECT id, name, CAST(price AS DECIMAL(10,2)) as price, quantity,
+                                is_scheduled, schedule_type as schedule_category
+                         FROM products
+                         WHERE name LIKE %s
+                         AND quantity > 0
+                         AND expiry_date > CURDATE()
+                         ORDER BY name
+                         LIMIT 10''',
+    'checkout_products': '''SELECT id, price, quantity, is_scheduled, schedule_type
+                            FROM products
+                            WHERE id IN ({ids})
+                            ORDER BY id
+                            FOR UPDATE''',
+}
+
+# Statements kept per connection; the oldest is closed beyond this
+MAX_STATEMENTS_PER_CONNECTION = 32
+
+# {connection: OrderedDict((name, size) -> (sql, cursor))}
+_prepared = weakref.WeakKeyDictionary()
+
+
+def _statement(conn, name, size):
+    """Return ``(sql, cursor)`` for a statement prepared once per connection.
+
+    mysql-connector only re-prepares when it is given a different SQL
+    object, so the exact string is cached alongside its cursor.
+    """
+    statements = _prepared.get(conn)
+    if statements is None:
+        statements = _prepared[conn] = OrderedDict()
+    key = (name, size)
+    if key in statements:
+        statements.move_to_end(key)
+        return statements[key]
+
+    sql = STATEMENTS[name]
+    if size is not None:
+        sql = sql.format(ids=', '.join(['%s'] * size))
+    statements[key] = (sql, conn.cursor(prepared=True, dictionary=True))
+    if len(statements) > MAX_STATEMENTS_PER_CONNECTION:
+        _, (_, oldest) = statements.popitem(last=False)
+        oldest.close()
+    return statements[key]
+
+
+def fetch_all(conn, name, params, size=None):
+    """Run a registered statement and return all rows as dicts.
+
+    Falls back to a plain text-protocol cursor when PREPARED_STATEMENTS is off.
+    """
+    if not Config.PREPARED_STATEMENTS:
+        sql = STATEMENTS[name]
+        if size is not None:
+            sql = sql.format(ids=', '.join(['%s'] * size))
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    sql, cursor = _statement(conn, name, size)
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    except Exception:
+        # The statement may be gone server-side; prepare it afresh next time
+        _prepared.get(conn, {}).pop((name, size), None)
+        raise
+
+
+def fetch_one(conn, name, params):
+    """Run a registered statement and return its first row, or None."""
+    rows = fetch_all(conn, name, params)
+    return rows[0] if rows else None
@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
 from datetime import datetime
 from ..forms import RegisterForm, EditUserForm
 from ..models.database import get_db
+from ..models.query_stats import query_stats
 from ..utils.decorators import admin_required
 from ..utils.logging import log_activity
 from werkzeug.security import generate_password_hash
@@ -141,4 +142,22 @@ def delete_user(user_id):
         return redirect(url_for('admin.users'))
     except Exception as e:
         flash('An error occurred while deleting the user.', 'error')
-        return redirect(url_for('admin.users')) 
\ No newline at end of file
+        return redirect(url_for('admin.users')) 
+
+@admin.route('/queries')
+@admin_required
+def queries():
+    """Show the most expensive query fingerprints across all workers (admin only)."""
+    sort = request.args.get('sort', 'total')
+    fingerprints, workers = query_stats.top(current_app.config['QUERY_STATS_TOP_N'], sort)
+    return render_template('admin/queries.html', fingerprints=fingerprints, workers=workers,
+                           sort=sort, enabled=query_stats.enabled, slow_ms=query_stats.slow_ms)
+
+@admin.route('/queries/reset', methods=['POST'])
+@admin_required
+def reset_queries():
+    """Clear the query totals of all workers (admin only)."""
+    query_stats.reset()
+    log_activity(session['user_id'], 'query_stats_reset')
+    flash('Query statistics cleared.', 'success')
+    return redirect(url_for('admin.queries'))
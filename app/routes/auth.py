@@ -5,6 +5,7 @@ from werkzeug.security import check_password_hash, generate_password_hash
 from datetime import datetime
 from ..forms import LoginForm, RegisterForm
 from ..models.database import get_db
+from ..models.statements import fetch_one
 from ..utils.decorators import admin_required, login_required
 from ..utils.logging import log_activity
 import random, smtplib, ssl
@@ -24,10 +25,7 @@ def login():
     if form.validate_on_submit():
         try:
             with get_db() as conn:
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute('SELECT id, username, password, role FROM users WHERE username = %s', 
-                             (form.username.data,))
-                user = cursor.fetchone()
+                user = fetch_one(conn, 'user_by_username', (form.username.data,))
                 
                 if user and check_password_hash(user['password'], form.password.data):
                     session['user_id'] = user['id']
@@ -36,6 +34,7 @@ def login():
                     
                     # Update last login
                     now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    cursor = conn.cursor()
                     cursor.execute('UPDATE users SET last_login = %s WHERE id = %s', 
                                  (now, user['id']))
                     
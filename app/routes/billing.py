@@ -1,13 +1,23 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, send_file
-from datetime import datetime, timedelta
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, send_file, current_app, Response, stream_with_context
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
 from ..forms import BillingForm
 from ..models.database import get_db
+from ..models.statements import fetch_all, fetch_one
+from ..models.bills import create_bill, decode_cursor, iter_bill_item_rows, list_bills, remove_bill
+from ..utils.date_filters import bill_date_filter
 from ..utils.decorators import login_required
+from ..utils.export_jobs import enqueue_export, get_job, result_path
 from ..utils.logging import log_activity
+from ..utils.metrics import PDF_RENDER_SECONDS
+from ..utils import pdf_cache
+from ..utils.dashboard_cache import invalidate_dashboard
+from ..utils.product_index import like_pattern, product_index
+import csv
 import json
 import pdfkit
 import os
-from io import BytesIO
 
 billing = Blueprint('billing', __name__)
 
@@ -20,35 +30,16 @@ def index():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        with get_db() as conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Base query
-            query = '''SELECT b.*, u.username as created_by_name 
-                      FROM bills b 
-                      LEFT JOIN users u ON b.created_by = u.id'''
-            params = []
-            
-            # Add date filtering
-            if filter_type == 'today':
-                query += " WHERE DATE(b.bill_date) = CURDATE()"
-            elif filter_type == 'yesterday':
-                query += " WHERE DATE(b.bill_date) = DATE_SUB(CURDATE(), INTERVAL 1 DAY)"
-            elif filter_type == 'this_week':
-                query += " WHERE YEARWEEK(b.bill_date) = YEARWEEK(CURDATE())"
-            elif filter_type == 'this_month':
-                query += " WHERE MONTH(b.bill_date) = MONTH(CURDATE()) AND YEAR(b.bill_date) = YEAR(CURDATE())"
-            elif filter_type == 'this_year':
-                query += " WHERE YEAR(b.bill_date) = YEAR(CURDATE())"
-            elif filter_type == 'custom' and start_date and end_date:
-                query += " WHERE DATE(b.bill_date) BETWEEN %s AND %s"
-                params.extend([start_date, end_date])
-            
-            query += " ORDER BY b.bill_date DESC"
-            cursor.execute(query, params)
-            bills = cursor.fetchall()
+        before = decode_cursor(request.args.get('before'))
+        
+        conditions, params = bill_date_filter(filter_type, start_date, end_date)
+        
+        with get_db(readonly=True) as conn:
+            bills, next_cursor = list_bills(conn, conditions, params, before,
+                                            current_app.config['BILLS_PAGE_SIZE'])
             
         return render_template('billing/index.html', bills=bills, 
+                             next_cursor=next_cursor,
                              filter_type=filter_type, 
                              start_date=start_date, 
                              end_date=end_date)
@@ -69,54 +60,19 @@ def new_bill():
                 return redirect(url_for('billing.new_bill'))
             
             with get_db() as conn:
-                cursor = conn.cursor(dictionary=True)
-                
-                # Create bill
-                cursor.execute('''INSERT INTO bills 
-                            (customer_name, customer_phone, customer_email, 
-                             total_amount, bill_date, payment_method, created_by)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s)''',
-                         (form.customer_name.data, form.customer_phone.data,
-                          form.customer_email.data, 0, datetime.now().date(),
-                          form.payment_method.data, session['user_id']))
-                
-                bill_id = cursor.lastrowid
-                total_amount = 0
-                
-                # Add bill items
-                for item in items:
-                    product_id = item['id']
-                    quantity = item['quantity']
-                    
-                    # Get product details
-                    cursor.execute('SELECT price, quantity FROM products WHERE id = %s', (product_id,))
-                    product = cursor.fetchone()
-                    
-                    if not product:
-                        raise Exception(f"Product {product_id} not found")
-                    
-                    if product['quantity'] < quantity:
-                        raise Exception(f"Insufficient stock for product {product_id}")
-                    
-                    # Update product quantity
-                    cursor.execute('UPDATE products SET quantity = quantity - %s WHERE id = %s',
-                                 (quantity, product_id))
-                    
-                    # Add bill item
-                    cursor.execute('''INSERT INTO bill_items 
-                                (bill_id, product_id, quantity, unit_price)
-                                VALUES (%s, %s, %s, %s)''',
-                             (bill_id, product_id, quantity, product['price']))
-                    
-                    total_amount += product['price'] * quantity
-                
-                # Update bill total
-                cursor.execute('UPDATE bills SET total_amount = %s WHERE id = %s',
-                             (total_amount, bill_id))
-                
-                log_activity(session['user_id'], 'bill_created', f"Created bill #{bill_id}")
-                flash('Bill created successfully!', 'success')
-                return redirect(url_for('billing.view_bill', bill_id=bill_id))
+                bill_id = create_bill(conn,
+                                      form.customer_name.data,
+                                      form.customer_phone.data,
+                                      form.customer_email.data,
+                                      form.payment_method.data,
+                                      session['user_id'],
+                                      items)
+            
+            invalidate_dashboard()
+            product_index.mark_stale()
+            log_activity(session['user_id'], 'bill_created', f"Created bill #{bill_id}")
+            flash('Bill created successfully!', 'success')
+            return redirect(url_for('billing.view_bill', bill_id=bill_id))
                 
         except Exception as e:
             flash(f'An error occurred while creating the bill: {str(e)}', 'error')
@@ -130,25 +86,15 @@ def view_bill(bill_id):
     """View a bill."""
     try:
         with get_db() as conn:
-            cursor = conn.cursor(dictionary=True)
-            
             # Get bill details
-            cursor.execute('''SELECT b.*, u.username as created_by_name 
-                        FROM bills b 
-                        LEFT JOIN users u ON b.created_by = u.id 
-                        WHERE b.id = %s''', (bill_id,))
-            bill = cursor.fetchone()
+            bill = fetch_one(conn, 'bill_by_id', (bill_id,))
             
             if not bill:
                 flash('Bill not found.', 'error')
                 return redirect(url_for('billing.index'))
             
             # Get bill items
-            cursor.execute('''SELECT bi.*, p.name as product_name 
-                        FROM bill_items bi 
-                        JOIN products p ON bi.product_id = p.id 
-                        WHERE bi.bill_id = %s''', (bill_id,))
-            items = cursor.fetchall()
+            items = fetch_all(conn, 'bill_items_by_bill', (bill_id,))
             
         return render_template('billing/view_bill.html', bill=bill, items=items)
     except Exception as e:
@@ -160,43 +106,40 @@ def view_bill(bill_id):
 def download_bill_pdf(bill_id):
     """Download bill as PDF."""
     try:
+        cache_dir = current_app.config['PDF_CACHE_DIR']
+        
         with get_db() as conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get bill details
-            cursor.execute('''SELECT b.*, u.username as created_by_name 
-                        FROM bills b 
-                        LEFT JOIN users u ON b.created_by = u.id 
-                        WHERE b.id = %s''', (bill_id,))
-            bill = cursor.fetchone()
+            # Checked on a cache hit too: a delete racing a render can leave
+            # a rendering behind for a bill that is gone
+            bill = fetch_one(conn, 'bill_by_id', (bill_id,))
             
             if not bill:
+                pdf_cache.invalidate(cache_dir, bill_id)
                 flash('Bill not found.', 'error')
                 return redirect(url_for('billing.index'))
             
-            # Get bill items
-            cursor.execute('''SELECT bi.*, p.name as product_name 
-                        FROM bill_items bi 
-                        JOIN products p ON bi.product_id = p.id 
-                        WHERE bi.bill_id = %s''', (bill_id,))
-            items = cursor.fetchall()
-            
+            # Bills never change once created, so a cached rendering is final
+            pdf_path = pdf_cache.get(cache_dir, bill_id)
+            if not pdf_path:
+                # Get bill items
+                items = fetch_all(conn, 'bill_items_by_bill', (bill_id,))
+        
+        if not pdf_path:
             # Generate HTML
             html = render_template('billing/bill_pdf.html', bill=bill, items=items)
             
             # Convert to PDF
-            pdf = pdfkit.from_string(html, False)
-            
-            # Create BytesIO object
-            pdf_file = BytesIO(pdf)
-            pdf_file.seek(0)
-            
-            return send_file(
-                pdf_file,
-                mimetype='application/pdf',
-                as_attachment=True,
-                download_name=f'bill_{bill_id}.pdf'
-            )
+            with PDF_RENDER_SECONDS.labels('bill').time():
+                pdf = pdfkit.from_string(html, False)
+            pdf_path = pdf_cache.put(cache_dir, bill_id, pdf,
+                                     current_app.config['PDF_CACHE_MAX_BYTES'])
+        
+        return send_file(
+            pdf_path,
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name=f'bill_{bill_id}.pdf'
+        )
             
     except Exception as e:
         flash('An error occurred while generating PDF.', 'error')
@@ -208,25 +151,18 @@ def delete_bill(bill_id):
     """Delete a bill."""
     try:
         with get_db() as conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get bill items
-            cursor.execute('SELECT product_id, quantity FROM bill_items WHERE bill_id = %s', (bill_id,))
-            items = cursor.fetchall()
-            
-            # Restore product quantities
-            for item in items:
-                cursor.execute('UPDATE products SET quantity = quantity + %s WHERE id = %s',
-                             (item['quantity'], item['product_id']))
-            
-            # Delete bill items
-            cursor.execute('DELETE FROM bill_items WHERE bill_id = %s', (bill_id,))
-            
-            # Delete bill
-            cursor.execute('DELETE FROM bills WHERE id = %s', (bill_id,))
+            deleted = remove_bill(conn, bill_id)
+        
+        if not deleted:
+            flash('Bill not found.', 'error')
+            return redirect(url_for('billing.index'))
             
-            log_activity(session['user_id'], 'bill_deleted', f"Deleted bill #{bill_id}")
-            flash('Bill deleted successfully!', 'success')
+        pdf_cache.invalidate(current_app.config['PDF_CACHE_DIR'], bill_id)
+        invalidate_dashboard()
+        product_index.mark_stale()
+        
+        log_activity(session['user_id'], 'bill_deleted', f"Deleted bill #{bill_id}")
+        flash('Bill deleted successfully!', 'success')
             
         return redirect(url_for('billing.index'))
     except Exception as e:
@@ -238,19 +174,20 @@ def delete_bill(bill_id):
 def search_products():
     """Search products for billing."""
     query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify([])
+    if current_app.config['PRODUCT_INDEX_ENABLED']:
+        try:
+            product_index.ensure_fresh(get_db,
+                                       current_app.config['PRODUCT_INDEX_SYNC_INTERVAL'],
+                                       current_app.config['PRODUCT_INDEX_RELOAD_INTERVAL'])
+            return jsonify(product_index.search(query))
+        except Exception as e:
+            print(f"Product index error, falling back to SQL: {str(e)}")
+    
     try:
         with get_db() as conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute('''
-                SELECT id, name, CAST(price AS DECIMAL(10,2)) as price, quantity, is_scheduled, schedule_type as schedule_category
-                FROM products 
-                WHERE (name LIKE %s OR description LIKE %s) 
-                AND quantity > 0 
-                AND expiry_date > CURDATE()
-                ORDER BY name 
-                LIMIT 10
-            ''', (f'%{query}%', f'%{query}%'))
-            products = cursor.fetchall()
+            products = fetch_all(conn, 'product_search', (like_pattern(query),))
             
             # Convert price to float for each product
             for product in products:
@@ -260,101 +197,160 @@ def search_products():
     except Exception as e:
         return jsonify([])
 
+EXPORT_CSV_COLUMNS = ['bill_id', 'bill_date', 'customer_name', 'customer_phone',
+                      'customer_email', 'payment_method', 'total_amount',
+                      'created_by_name', 'product_id', 'product_name',
+                      'quantity', 'unit_price']
+
+def _export_value(value):
+    """Render a DB value for CSV/JSON output."""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def _export_filename(filter_type, start_date, end_date, extension):
+    if filter_type == 'custom':
+        return f'bills_{start_date}_to_{end_date}.{extension}'
+    return f'bills_{filter_type}.{extension}'
+
+def _stream_export(generate, mimetype, filename):
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        # Ask proxies not to buffer the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+@billing.route('/export.csv')
+@login_required
+def export_bills_csv():
+    """Stream the filtered bills as CSV, one row per bill item."""
+    filter_type = request.args.get('filter', 'all')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    conditions, params = bill_date_filter(filter_type, start_date, end_date)
+    
+    def generate():
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_CSV_COLUMNS)
+        yield buffer.getvalue()
+        with get_db(scoped=False, readonly=True) as conn:
+            for row in iter_bill_item_rows(conn, conditions, params):
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerow([_export_value(row[column]) for column in EXPORT_CSV_COLUMNS])
+                yield buffer.getvalue()
+    
+    return _stream_export(generate, 'text/csv',
+                          _export_filename(filter_type, start_date, end_date, 'csv'))
+
+@billing.route('/export.ndjson')
+@login_required
+def export_bills_ndjson():
+    """Stream the filtered bills as newline-delimited JSON, one bill per line."""
+    filter_type = request.args.get('filter', 'all')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    conditions, params = bill_date_filter(filter_type, start_date, end_date)
+    
+    def generate():
+        with get_db(scoped=False, readonly=True) as conn:
+            bill = None
+            for row in iter_bill_item_rows(conn, conditions, params):
+                # Rows arrive grouped by bill, so only one bill is held at a time
+                if bill is None or bill['id'] != row['bill_id']:
+                    if bill is not None:
+                        yield json.dumps(bill) + '\n'
+                    bill = {
+                        'id': row['bill_id'],
+                        'bill_date': _export_value(row['bill_date']),
+                        'customer_name': row['customer_name'],
+                        'customer_phone': row['customer_phone'],
+                        'customer_email': row['customer_email'],
+                        'payment_method': row['payment_method'],
+                        'total_amount': _export_value(row['total_amount']),
+                        'created_by_name': row['created_by_name'],
+                        'items': []
+                    }
+                if row['product_id'] is not None:
+                    bill['items'].append({
+                        'product_id': row['product_id'],
+                        'product_name': row['product_name'],
+                        'quantity': row['quantity'],
+                        'unit_price': _export_value(row['unit_price'])
+                    })
+            if bill is not None:
+                yield json.dumps(bill) + '\n'
+    
+    return _stream_export(generate, 'application/x-ndjson',
+                          _export_filename(filter_type, start_date, end_date, 'ndjson'))
+
 @billing.route('/export-pdf')
 @login_required
 def export_bills_pdf():
-    """Export filtered bills as PDF."""
+    """Queue a PDF export of the filtered bills."""
     try:
         filter_type = request.args.get('filter', 'all')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        with get_db() as conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Base query
-            query = '''SELECT b.*, u.username as created_by_name 
-                      FROM bills b 
-                      LEFT JOIN users u ON b.created_by = u.id'''
-            params = []
-            
-            # Add date filtering
-            if filter_type == 'today':
-                query += " WHERE DATE(b.bill_date) = CURDATE()"
-            elif filter_type == 'yesterday':
-                query += " WHERE DATE(b.bill_date) = DATE_SUB(CURDATE(), INTERVAL 1 DAY)"
-            elif filter_type == 'this_week':
-                query += " WHERE YEARWEEK(b.bill_date) = YEARWEEK(CURDATE())"
-            elif filter_type == 'this_month':
-                query += " WHERE MONTH(b.bill_date) = MONTH(CURDATE()) AND YEAR(b.bill_date) = YEAR(CURDATE())"
-            elif filter_type == 'this_year':
-                query += " WHERE YEAR(b.bill_date) = YEAR(CURDATE())"
-            elif filter_type == 'custom' and start_date and end_date:
-                query += " WHERE DATE(b.bill_date) BETWEEN %s AND %s"
-                params.extend([start_date, end_date])
-            
-            query += " ORDER BY b.bill_date DESC"
-            cursor.execute(query, params)
-            bills = cursor.fetchall()
-            
-            if not bills:
-                flash('No bills found for the selected filter.', 'warning')
-                return redirect(url_for('billing.index'))
-            
-            # Get items for each bill
-            for bill in bills:
-                cursor.execute('''SELECT bi.*, p.name as product_name 
-                            FROM bill_items bi 
-                            JOIN products p ON bi.product_id = p.id 
-                            WHERE bi.bill_id = %s''', (bill['id'],))
-                bill['items'] = cursor.fetchall()
-            
-            # Generate HTML
-            html = render_template('billing/bills_pdf.html', 
-                                 bills=bills,
-                                 filter_type=filter_type,
-                                 start_date=start_date,
-                                 end_date=end_date,
-                                 now=datetime.now())
-            
-            # Configure PDF options
-            options = {
-                'page-size': 'A4',
-                'margin-top': '20mm',
-                'margin-right': '20mm',
-                'margin-bottom': '20mm',
-                'margin-left': '20mm',
-                'encoding': 'UTF-8',
-                'no-outline': None,
-                'quiet': ''
-            }
-            
-            # Convert to PDF
-            try:
-                pdf = pdfkit.from_string(html, False, options=options)
-            except Exception as e:
-                print(f"PDF generation error: {str(e)}")
-                flash('Error generating PDF. Please check if wkhtmltopdf is installed.', 'error')
-                return redirect(url_for('billing.index'))
-            
-            # Create BytesIO object
-            pdf_file = BytesIO(pdf)
-            pdf_file.seek(0)
-            
-            # Generate filename based on filter
-            if filter_type == 'custom':
-                filename = f'bills_{start_date}_to_{end_date}.pdf'
-            else:
-                filename = f'bills_{filter_type}.pdf'
-            
-            return send_file(
-                pdf_file,
-                mimetype='application/pdf',
-                as_attachment=True,
-                download_name=filename
-            )
+        conditions, params = bill_date_filter(filter_type, start_date, end_date)
+        job_id = enqueue_export(current_app.config, session['user_id'],
+                                filter_type, start_date, end_date,
+                                conditions, params)
+        
+        return redirect(url_for('billing.export_status', job_id=job_id))
             
     except Exception as e:
         print(f"Export error: {str(e)}")
         flash('An error occurred while generating PDF.', 'error')
-        return redirect(url_for('billing.index')) 
\ No newline at end of file
+        return redirect(url_for('billing.index'))
+
+def _get_export_job(job_id):
+    """Return the export job if it exists and belongs to the current user."""
+    job = get_job(current_app.config['EXPORT_JOB_DIR'],
+                  current_app.config['EXPORT_JOB_TTL'], job_id)
+    if job and (job['user_id'] == session['user_id'] or session.get('is_admin')):
+        return job
+    return None
+
+@billing.route('/exports/<job_id>')
+@login_required
+def export_status(job_id):
+    """Show the progress of a PDF export."""
+    job = _get_export_job(job_id)
+    if not job:
+        flash('Export not found or expired.', 'error')
+        return redirect(url_for('billing.index'))
+    return render_template('billing/export_status.html', job=job)
+
+@billing.route('/exports/<job_id>/status')
+@login_required
+def export_job_status(job_id):
+    """Return the status of a PDF export as JSON for polling."""
+    job = _get_export_job(job_id)
+    if not job:
+        return jsonify({'error': 'Export not found or expired'}), 404
+    return jsonify({
+        'id': job['id'],
+        'status': job['status'],
+        'error': job['error'],
+        'download_url': url_for('billing.download_export', job_id=job_id) if job['status'] == 'done' else None
+    })
+
+@billing.route('/exports/<job_id>/download')
+@login_required
+def download_export(job_id):
+    """Download a finished PDF export."""
+    job = _get_export_job(job_id)
+    if not job or job['status'] != 'done':
+        flash('Export not found or expired.', 'error')
+        return redirect(url_for('billing.index'))
+    return send_file(
+        os.path.abspath(result_path(current_app.config['EXPORT_JOB_DIR'], job_id)),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=job['filename']
+    )
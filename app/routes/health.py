@@ -0,0 +1,33 @@
+from flask import Blueprint, jsonify
+from ..models.database import get_db, get_pool, replica_status
+from ..utils.logging import activity_log_writer
+
+health = Blueprint('health', __name__)
+
+@health.route('')
+def liveness():
+    """Report that the process is up; never touches the database."""
+    return jsonify({'status': 'ok'})
+
+@health.route('/ready')
+def readiness():
+    """Report whether a database connection can be checked out and used."""
+    error = None
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.fetchall()
+    except Exception as e:
+        error = str(e)
+    
+    status = {
+        'status': 'unavailable' if error else 'ok',
+        'pool': get_pool().stats(),
+        'replica': replica_status(),
+        'activity_log': activity_log_writer.stats(),
+    }
+    if error:
+        status['error'] = error
+        return jsonify(status), 503
+    return jsonify(status)
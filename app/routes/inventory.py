@@ -1,50 +1,46 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from datetime import datetime
-from ..forms import ProductForm, SupplierForm
+import io
+import json
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, jsonify
+from datetime import datetime, date
+from ..forms import ProductForm, ProductImportForm, SupplierForm, GoodsReceiptForm
 from ..models.database import get_db
+from ..models.product_import import import_products, ProductImportError
+from ..models.products import SORTS, decode_cursor, list_products, lookup_products_query
+from ..models.receipts import create_receipt
 from ..utils.decorators import login_required
+from ..utils.dashboard_cache import invalidate_dashboard
 from ..utils.logging import log_activity
+from ..utils.product_index import product_index
+from ..utils.supplier_cache import supplier_choices, bump_supplier_version
 
 inventory = Blueprint('inventory', __name__)
 
 @inventory.route('/')
 @login_required
 def index():
-    """List all products."""
+    """List products a page at a time."""
+    filter_type = request.args.get('filter', '')
+    search = request.args.get('q', '').strip()
+    sort = request.args.get('sort', 'name')
+    if sort not in SORTS:
+        sort = 'name'
+    after = decode_cursor(request.args.get('after', ''), sort)
     try:
-        with get_db() as conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get filter parameters
-            filter_type = request.args.get('filter', '')
-            
-            # Base query
-            query = """
-                SELECT p.*, s.name as supplier_name 
-                FROM products p 
-                LEFT JOIN suppliers s ON p.supplier_id = s.id
-            """
-            
-            # Apply filters
-            if filter_type == 'expired':
-                query += " WHERE p.expiry_date < CURDATE()"
-            elif filter_type == 'low_stock':
-                query += " WHERE p.quantity <= p.min_quantity"
-            elif filter_type == 'scheduled':
-                query += " WHERE p.is_scheduled = TRUE"
-            
-            query += " ORDER BY p.name"
-            
-            cursor.execute(query)
-            products = cursor.fetchall()
+        with get_db(readonly=True) as conn:
+            products, next_cursor = list_products(conn, filter_type, search, sort, after,
+                                                  current_app.config['INVENTORY_PAGE_SIZE'])
             
             # Get current date for expiry comparison
             now = datetime.now().date()
             
-        return render_template('inventory/index.html', products=products, now=now)
+        return render_template('inventory/index.html', products=products, now=now,
+                               filter_type=filter_type, search=search, sort=sort,
+                               next_cursor=next_cursor)
     except Exception as e:
         flash('An error occurred while fetching products.', 'error')
-        return render_template('inventory/index.html', products=[])
+        return render_template('inventory/index.html', products=[], now=datetime.now().date(),
+                               filter_type=filter_type, search=search, sort=sort,
+                               next_cursor=None)
 
 @inventory.route('/products/add', methods=['GET', 'POST'])
 @login_required
@@ -52,11 +48,7 @@ def add_product():
     """Add a new product."""
     form = ProductForm()
     try:
-        with get_db() as conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute('SELECT id, name FROM suppliers ORDER BY name')
-            suppliers = cursor.fetchall()
-            form.supplier_id.choices = [(0, '-- Select Supplier --')] + [(s['id'], s['name']) for s in suppliers]
+        form.supplier_id.choices = [(0, '-- Select Supplier --')] + supplier_choices(get_db)
     except Exception as e:
         flash(f'An error occurred while fetching suppliers: {str(e)}', 'error')
         return redirect(url_for('inventory.index'))
@@ -81,6 +73,8 @@ def add_product():
                           now))
                 conn.commit()
                 
+                invalidate_dashboard()
+                product_index.mark_stale()
                 log_activity(session['user_id'], 'product_created', f"Created product: {form.name.data}")
                 flash('Product added successfully!', 'success')
                 return redirect(url_for('inventory.index'))
@@ -95,11 +89,9 @@ def edit_product(product_id):
     """Edit a product."""
     form = ProductForm()
     try:
+        form.supplier_id.choices = [(0, '-- Select Supplier --')] + supplier_choices(get_db)
         with get_db() as conn:
             cursor = conn.cursor(dictionary=True)
-            cursor.execute('SELECT id, name FROM suppliers ORDER BY name')
-            suppliers = cursor.fetchall()
-            form.supplier_id.choices = [(0, '-- Select Supplier --')] + [(s['id'], s['name']) for s in suppliers]
             
             if request.method == 'GET':
                 cursor.execute('SELECT * FROM products WHERE id = %s', (product_id,))
@@ -134,6 +126,8 @@ def edit_product(product_id):
                           product_id))
                 conn.commit()
                 
+                invalidate_dashboard()
+                product_index.mark_stale()
                 log_activity(session['user_id'], 'product_updated', f"Updated product: {form.name.data}")
                 flash('Product updated successfully!', 'success')
                 return redirect(url_for('inventory.index'))
@@ -162,6 +156,8 @@ def delete_product(product_id):
             cursor.execute('DELETE FROM products WHERE id = %s', (product_id,))
             conn.commit()
             
+            invalidate_dashboard()
+            product_index.remove(product_id)
             log_activity(session['user_id'], 'product_deleted', f"Deleted product: {product['name']}")
             flash('Product deleted successfully!', 'success')
             
@@ -170,6 +166,35 @@ def delete_product(product_id):
         flash(f'An error occurred while deleting the product: {str(e)}', 'error')
         return redirect(url_for('inventory.index'))
 
+@inventory.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_products_csv():
+    """Import or restock products from a CSV file."""
+    form = ProductImportForm()
+    if form.validate_on_submit():
+        upload = form.file.data
+        try:
+            stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+            with get_db() as conn:
+                rows, inserted, updated = import_products(
+                    conn, stream, current_app.config['PRODUCT_IMPORT_CHUNK_SIZE'])
+            
+            invalidate_dashboard()
+            product_index.mark_stale()
+            log_activity(session['user_id'], 'products_imported',
+                         f"Imported {rows} rows from {upload.filename}: {inserted} new, {updated} updated")
+            flash(f'Imported {rows} rows: {inserted} new products, {updated} restocked.', 'success')
+            return redirect(url_for('inventory.index'))
+        except ProductImportError as e:
+            for error in e.errors:
+                flash(error, 'error')
+        except UnicodeDecodeError:
+            flash('The file must be UTF-8 encoded CSV.', 'error')
+        except Exception as e:
+            flash(f'An error occurred while importing products: {str(e)}', 'error')
+    
+    return render_template('inventory/import_products.html', form=form)
+
 @inventory.route('/suppliers')
 @login_required
 def suppliers():
@@ -201,6 +226,7 @@ def add_supplier():
                           form.email.data, form.address.data, now))
                 conn.commit()
                 
+                bump_supplier_version()
                 log_activity(session['user_id'], 'supplier_created', f"Created supplier: {form.name.data}")
                 flash('Supplier added successfully!', 'success')
                 return redirect(url_for('inventory.suppliers'))
@@ -240,6 +266,7 @@ def edit_supplier(supplier_id):
                           form.email.data, form.address.data, supplier_id))
                 conn.commit()
                 
+                bump_supplier_version()
                 log_activity(session['user_id'], 'supplier_updated', f"Updated supplier: {form.name.data}")
                 flash('Supplier updated successfully!', 'success')
                 return redirect(url_for('inventory.suppliers'))
@@ -269,14 +296,134 @@ def delete_supplier(supplier_id):
                 flash('Cannot delete supplier with associated products.', 'error')
                 return redirect(url_for('inventory.suppliers'))
             
+            cursor.execute('SELECT COUNT(*) as count FROM goods_receipts WHERE supplier_id = %s', (supplier_id,))
+            if cursor.fetchone()['count'] > 0:
+                flash('Cannot delete supplier with goods receipts.', 'error')
+                return redirect(url_for('inventory.suppliers'))
+            
             # Delete supplier
             cursor.execute('DELETE FROM suppliers WHERE id = %s', (supplier_id,))
             conn.commit()
             
+            bump_supplier_version()
             log_activity(session['user_id'], 'supplier_deleted', f"Deleted supplier: {supplier['name']}")
             flash('Supplier deleted successfully!', 'success')
             
         return redirect(url_for('inventory.suppliers'))
     except Exception as e:
         flash(f'An error occurred while deleting the supplier: {str(e)}', 'error')
-        return redirect(url_for('inventory.suppliers')) 
\ No newline at end of file
+        return redirect(url_for('inventory.suppliers'))
+
+@inventory.route('/products/lookup')
+@login_required
+def lookup_products():
+    """Look up products by name prefix for goods receipts, including out of stock ones."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify([])
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(*lookup_products_query(query))
+            products = cursor.fetchall()
+            
+            for product in products:
+                product['expiry_date'] = product['expiry_date'].isoformat() if product['expiry_date'] else None
+                
+        return jsonify(products)
+    except Exception as e:
+        return jsonify([])
+
+@inventory.route('/receipts')
+@login_required
+def receipts():
+    """List recent goods receipts."""
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('''SELECT r.id, r.invoice_number, r.received_date, r.total_cost,
+                               s.name as supplier_name, u.username as created_by_name,
+                               (SELECT COUNT(*) FROM goods_receipt_items i WHERE i.receipt_id = r.id) as line_count
+                        FROM goods_receipts r
+                        JOIN suppliers s ON r.supplier_id = s.id
+                        LEFT JOIN users u ON r.created_by = u.id
+                        ORDER BY r.id DESC
+                        LIMIT 100''')
+            receipts = cursor.fetchall()
+        return render_template('inventory/receipts.html', receipts=receipts)
+    except Exception as e:
+        flash('An error occurred while fetching goods receipts.', 'error')
+        return render_template('inventory/receipts.html', receipts=[])
+
+@inventory.route('/receipts/new', methods=['GET', 'POST'])
+@login_required
+def new_receipt():
+    """Receive stock from a supplier."""
+    form = GoodsReceiptForm()
+    try:
+        form.supplier_id.choices = [(0, '-- Select Supplier --')] + supplier_choices(get_db)
+    except Exception as e:
+        flash(f'An error occurred while fetching suppliers: {str(e)}', 'error')
+        return redirect(url_for('inventory.receipts'))
+    
+    if request.method == 'GET' and not form.received_date.data:
+        form.received_date.data = date.today()
+
+    if form.validate_on_submit():
+        try:
+            items = json.loads(request.form.get('items', '[]'))
+            if not items:
+                flash('Please add at least one product to the receipt.', 'error')
+                return redirect(url_for('inventory.new_receipt'))
+            
+            with get_db() as conn:
+                receipt_id = create_receipt(conn,
+                                            form.supplier_id.data,
+                                            form.invoice_number.data,
+                                            form.received_date.data,
+                                            form.notes.data,
+                                            session['user_id'],
+                                            items)
+            
+            invalidate_dashboard()
+            product_index.mark_stale()
+            log_activity(session['user_id'], 'goods_received',
+                         f"Posted goods receipt #{receipt_id} with {len(items)} lines")
+            flash('Goods receipt posted successfully!', 'success')
+            return redirect(url_for('inventory.view_receipt', receipt_id=receipt_id))
+        
+        except Exception as e:
+            flash(f'An error occurred while posting the receipt: {str(e)}', 'error')
+            return redirect(url_for('inventory.new_receipt'))
+    
+    return render_template('inventory/new_receipt.html', form=form)
+
+@inventory.route('/receipts/<int:receipt_id>')
+@login_required
+def view_receipt(receipt_id):
+    """View a goods receipt."""
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('''SELECT r.*, s.name as supplier_name, u.username as created_by_name
+                        FROM goods_receipts r
+                        JOIN suppliers s ON r.supplier_id = s.id
+                        LEFT JOIN users u ON r.created_by = u.id
+                        WHERE r.id = %s''', (receipt_id,))
+            receipt = cursor.fetchone()
+            
+            if not receipt:
+                flash('Goods receipt not found.', 'error')
+                return redirect(url_for('inventory.receipts'))
+            
+            cursor.execute('''SELECT i.quantity, i.unit_cost, p.name as product_name, p.expiry_date
+                        FROM goods_receipt_items i
+                        JOIN products p ON i.product_id = p.id
+                        WHERE i.receipt_id = %s
+                        ORDER BY i.id''', (receipt_id,))
+            items = cursor.fetchall()
+            
+        return render_template('inventory/view_receipt.html', receipt=receipt, items=items)
+    except Exception as e:
+        flash('An error occurred while fetching the goods receipt.', 'error')
+        return redirect(url_for('inventory.receipts'))
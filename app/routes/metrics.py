@@ -0,0 +1,12 @@
+from flask import Blueprint, Response, abort, current_app
+from ..utils.metrics import render
+
+metrics = Blueprint('metrics', __name__)
+
+@metrics.route('')
+def export():
+    """Expose request, pool and PDF metrics from all workers in Prometheus text format."""
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+    body, content_type = render()
+    return Response(body, content_type=content_type)
@@ -0,0 +1,15 @@
+from datetime import date
+from .. import cache
+
+
+def dashboard_cache_key(day=None):
+    """Cache key for the dashboard stats; dated so they roll over at midnight."""
+    return f'dashboard_stats:{(day or date.today()).isoformat()}'
+
+
+def invalidate_dashboard():
+    """Drop the cached dashboard stats after a product or bill write."""
+    try:
+        cache.delete(dashboard_cache_key())
+    except Exception as e:
+        print(f"Error invalidating dashboard cache: {e}")
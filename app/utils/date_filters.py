@@ -0,0 +1,50 @@
+from datetime import date, datetime, time, timedelta
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def date_range(filter_type, start_date=None, end_date=None, today=None):
+    """Return the half-open ``(start, end)`` datetimes for a date filter.
+
+    Returns None when the filter does not restrict dates ('all', unknown
+    filters and incomplete custom ranges). Custom end dates are inclusive.
+    """
+    today = today or date.today()
+    if filter_type == 'today':
+        start, end = today, today + timedelta(days=1)
+    elif filter_type == 'yesterday':
+        start, end = today - timedelta(days=1), today
+    elif filter_type == 'this_week':
+        # Weeks start on Sunday, matching MySQL's default YEARWEEK() mode
+        start = today - timedelta(days=(today.weekday() + 1) % 7)
+        end = start + timedelta(days=7)
+    elif filter_type == 'this_month':
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    elif filter_type == 'this_year':
+        start, end = today.replace(month=1, day=1), today.replace(year=today.year + 1, month=1, day=1)
+    elif filter_type == 'custom':
+        start, end = _parse_date(start_date), _parse_date(end_date)
+        if not start or not end:
+            return None
+        end = end + timedelta(days=1)
+    else:
+        return None
+    return datetime.combine(start, time.min), datetime.combine(end, time.min)
+
+
+def bill_date_filter(filter_type, start_date=None, end_date=None, column='b.bill_date', today=None):
+    """Return the WHERE conditions and params for a bill date filter.
+
+    The column is compared against bounds computed here rather than wrapped
+    in DATE()/YEARWEEK()/MONTH(), so MySQL can range-scan the bill_date index.
+    """
+    bounds = date_range(filter_type, start_date, end_date, today)
+    if not bounds:
+        return [], []
+    return [f"{column} >= %s AND {column} < %s"], list(bounds)
@@ -0,0 +1,198 @@
+import json
+import multiprocessing
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from threading import Lock
+
+import pdfkit
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+PDF_OPTIONS = {
+    'page-size': 'A4',
+    'margin-top': '20mm',
+    'margin-right': '20mm',
+    'margin-bottom': '20mm',
+    'margin-left': '20mm',
+    'encoding': 'UTF-8',
+    'no-outline': None,
+    'quiet': ''
+}
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates')
+# A job still queued or running after this long lost its worker, e.g. to a restart
+ABANDONED_AFTER = 24 * 3600
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor(max_workers):
+    """Return this process's export worker pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawn rather than fork so workers never inherit open DB sockets
+            _executor = ProcessPoolExecutor(max_workers=max_workers,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _job_dir(export_dir, job_id):
+    return os.path.join(export_dir, job_id)
+
+
+def _write_status(job_dir, **fields):
+    """Merge ``fields`` into the job's status file atomically."""
+    status_path = os.path.join(job_dir, 'job.json')
+    try:
+        with open(status_path) as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        status = {}
+    status.update(fields)
+    tmp_path = f"{status_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp_path, status_path)
+    return status
+
+
+def _read_status(job_dir):
+    try:
+        with open(os.path.join(job_dir, 'job.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _expired(status, ttl, now):
+    """Whether a job is past its TTL, counted from when it finished.
+
+    Queued and running jobs are kept however long they take, unless they
+    have been at it for ABANDONED_AFTER.
+    """
+    if status['status'] in ('queued', 'running'):
+        return status['created_at'] < now - max(ttl, ABANDONED_AFTER)
+    return status.get('finished_at', status['created_at']) < now - ttl
+
+
+def purge_expired(export_dir, ttl):
+    """Remove finished export jobs older than ``ttl`` seconds, and abandoned ones."""
+    if not os.path.isdir(export_dir):
+        return
+    now = time.time()
+    for name in os.listdir(export_dir):
+        path = os.path.join(export_dir, name)
+        try:
+            if not os.path.isdir(path):
+                continue
+            status = _read_status(path)
+            if status is None:
+                # No readable status: fall back to the directory's age
+                expired = os.path.getmtime(path) < now - ttl
+            else:
+                expired = _expired(status, ttl, now)
+            if expired:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+def enqueue_export(config, user_id, filter_type, start_date, end_date, conditions, params):
+    """Queue a bulk bill PDF export and return its job id."""
+    export_dir = config['EXPORT_JOB_DIR']
+    purge_expired(export_dir, config['EXPORT_JOB_TTL'])
+
+    job_id = uuid.uuid4().hex
+    job_dir = _job_dir(export_dir, job_id)
+    os.makedirs(job_dir)
+
+    if filter_type == 'custom':
+        filename = f'bills_{start_date}_to_{end_date}.pdf'
+    else:
+        filename = f'bills_{filter_type}.pdf'
+    _write_status(job_dir, id=job_id, status='queued', user_id=user_id,
+                  filename=filename, created_at=time.time(), error=None)
+
+    try:
+        _get_executor(config['EXPORT_WORKERS']).submit(
+            _run_export, job_dir, filter_type, start_date, end_date,
+            conditions, params, config['BILL_EXPORT_CHUNK_SIZE'])
+    except Exception as e:
+        # A crashed worker breaks the whole pool; start a fresh one next time
+        _reset_executor()
+        _write_status(job_dir, status='failed', error=str(e))
+    return job_id
+
+
+def get_job(export_dir, ttl, job_id):
+    """Return the status dict for ``job_id`` or None if unknown or expired."""
+    if not job_id.isalnum():
+        return None
+    job_dir = _job_dir(export_dir, job_id)
+    status = _read_status(job_dir)
+    if status is None:
+        return None
+    if _expired(status, ttl, time.time()):
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return None
+    return status
+
+
+def result_path(export_dir, job_id):
+    """Return the path of a finished export's PDF."""
+    return os.path.join(_job_dir(export_dir, job_id), 'result.pdf')
+
+
+def _run_export(job_dir, filter_type, start_date, end_date, conditions, params, chunk_size):
+    """Render an export inside a worker process."""
+    from ..models.bills import iter_bills_with_items
+    from ..models.database import get_db
+    from .metrics import PDF_RENDER_SECONDS
+
+    _write_status(job_dir, status='running', started_at=time.time())
+    html_path = os.path.join(job_dir, 'bills.html')
+    try:
+        env = Environment(loader=FileSystemLoader(TEMPLATE_DIR),
+                          autoescape=select_autoescape(['html']))
+        template = env.get_template('billing/bills_pdf.html')
+        with get_db(readonly=True) as conn:
+            bills = iter_bills_with_items(conn, conditions, params, chunk_size)
+            first_bill = next(bills, None)
+            if first_bill is None:
+                _write_status(job_dir, status='empty', finished_at=time.time())
+                return
+
+            def all_bills():
+                yield first_bill
+                yield from bills
+
+            with open(html_path, 'w', encoding='utf-8') as html_file:
+                for chunk in template.generate(bills=all_bills(),
+                                               filter_type=filter_type,
+                                               start_date=start_date,
+                                               end_date=end_date,
+                                               now=datetime.now):
+                    html_file.write(chunk)
+
+        with PDF_RENDER_SECONDS.labels('export').time():
+            pdfkit.from_file(html_path, os.path.join(job_dir, 'result.pdf'), options=PDF_OPTIONS)
+        _write_status(job_dir, status='done', finished_at=time.time())
+    except Exception as e:
+        print(f"PDF export error: {str(e)}")
+        _write_status(job_dir, status='failed', error=str(e), finished_at=time.time())
+    finally:
+        if os.path.exists(html_path):
+            os.remove(html_path)
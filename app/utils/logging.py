@@ -1,15 +1,147 @@
+import atexit
+import os
+import queue
+import time
 from datetime import datetime
+from threading import Event, Lock, Thread
 from ..models.database import get_db
 
+
+def _write_rows(rows):
+    """Insert ``(user_id, action, details, created_at)`` rows with one statement."""
+    rows_sql = ', '.join(['(%s, %s, %s, %s)'] * len(rows))
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''INSERT INTO activity_logs
+                    (user_id, action, details, created_at)
+                    VALUES {rows_sql}''', [value for row in rows for value in row])
+
+
+class ActivityLogWriter:
+    """Buffers activity log events and writes them from a background thread.
+
+    Events go onto a bounded queue and are flushed with one multi-row
+    INSERT once ``batch_size`` events are waiting or ``flush_interval``
+    seconds have passed. When the queue is full, callers wait up to
+    ``put_timeout`` seconds (counted as backpressured) and the event is
+    dropped if there is still no room. Pending events are flushed at exit.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.batch_size = 100
+        self.flush_interval = 1.0
+        self.put_timeout = 0.05
+        self.queue_size = 10000
+        self._lock = Lock()
+        self._queue = None
+        self._thread = None
+        self._stopping = Event()
+        self._pid = None
+        self._counters = dict.fromkeys(
+            ('enqueued', 'written', 'dropped', 'backpressured', 'failed', 'batches'), 0)
+
+    def init_app(self, app):
+        self.enabled = app.config['ACTIVITY_LOG_ASYNC']
+        self.batch_size = app.config['ACTIVITY_LOG_BATCH_SIZE']
+        self.flush_interval = app.config['ACTIVITY_LOG_FLUSH_INTERVAL']
+        self.put_timeout = app.config['ACTIVITY_LOG_PUT_TIMEOUT']
+        self.queue_size = app.config['ACTIVITY_LOG_QUEUE_SIZE']
+        atexit.register(self.close)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._stopping = Event()
+            self._thread = Thread(target=self._run, name='activity-log-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def put(self, user_id, action, details=None):
+        """Queue one event; returns False if it had to be dropped."""
+        self._ensure_started()
+        row = (user_id, action, details, datetime.now())
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._count('backpressured')
+            try:
+                self._queue.put(row, timeout=self.put_timeout)
+            except queue.Full:
+                self._count('dropped')
+                return False
+        self._count('enqueued')
+        return True
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                row = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                row = None
+            if row is not None:
+                batch.append(row)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            # While stopping, keep draining until the queue is empty
+            drained = self._stopping.is_set() and self._queue.empty()
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline or drained):
+                self._flush(batch)
+                batch = []
+                deadline = None
+            if drained:
+                return
+
+    def _flush(self, batch):
+        try:
+            _write_rows(batch)
+            self._count('written', len(batch))
+        except Exception as e:
+            print(f"Error writing activity log batch: {e}")
+            # One bad row (e.g. a deleted user) should not lose the others
+            for row in batch:
+                try:
+                    _write_rows([row])
+                    self._count('written')
+                except Exception:
+                    self._count('failed')
+        self._count('batches')
+
+    def close(self, timeout=5):
+        """Flush queued events and stop the writer thread."""
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        """Return the writer counters and the current queue depth."""
+        with self._lock:
+            stats = dict(self._counters)
+        stats['queued'] = self._queue.qsize() if self._pid == os.getpid() else 0
+        return stats
+
+
+activity_log_writer = ActivityLogWriter()
+
+
 def log_activity(user_id, action, details=None):
     """Log user activity to the database."""
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            cursor.execute('''INSERT INTO activity_logs 
-                        (user_id, action, details, timestamp) 
-                        VALUES (%s, %s, %s, %s)''',
-                     (user_id, action, details, now))
+        if activity_log_writer.enabled:
+            activity_log_writer.put(user_id, action, details)
+        else:
+            _write_rows([(user_id, action, details, datetime.now())])
     except Exception as e:
-        print(f"Error logging activity: {e}") 
\ No newline at end of file
+        print(f"Error logging activity: {e}")
@@ -0,0 +1,106 @@
+import os
+import time
+from flask import g, request
+from app.config import Config
+
+# Multiprocess mode is picked when prometheus_client is imported, so the
+# directory must be in the environment first. Each gunicorn worker writes
+# its own files there and /metrics sums them.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', Config.METRICS_DIR)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+REQUESTS = Counter('pharmacy_http_requests_total', 'HTTP requests by endpoint and status',
+                   ['endpoint', 'method', 'status'])
+REQUEST_SECONDS = Histogram('pharmacy_http_request_duration_seconds', 'HTTP request latency',
+                            ['endpoint', 'method'],
+                            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+IN_FLIGHT = Gauge('pharmacy_http_requests_in_flight', 'Requests being handled',
+                  ['endpoint'], multiprocess_mode='livesum')
+POOL_CONNECTIONS = Gauge('pharmacy_db_pool_connections', 'Pooled database connections by state',
+                         ['pool', 'state'], multiprocess_mode='livesum')
+POOL_EVENTS = Counter('pharmacy_db_pool_events_total', 'Connection pool checkouts, waits and failures',
+                      ['pool', 'event'])
+POOL_WAIT_SECONDS = Counter('pharmacy_db_pool_wait_seconds_total', 'Time spent waiting for a connection',
+                            ['pool'])
+PDF_RENDER_SECONDS = Histogram('pharmacy_pdf_render_seconds', 'wkhtmltopdf render time', ['kind'],
+                               buckets=(0.25, 0.5, 1, 2, 5, 10, 30, 60, 120))
+
+POOL_STATES = ('in_use', 'idle', 'waiting')
+POOL_COUNTERS = ('checkouts', 'waits', 'timeouts', 'creations', 'discards', 'ping_failures', 'recycles')
+
+# Last pool counters seen by this process, to turn running totals into increments
+_pool_seen = {}
+_pool_seen_pid = None
+
+
+def init_app(app):
+    """Record request metrics for every endpoint except /metrics itself."""
+    if not app.config['METRICS_ENABLED']:
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_leave_request)
+    # Runs after the request's connection is back in the pool
+    app.teardown_appcontext(observe_pools)
+
+
+def _endpoint():
+    return request.endpoint or 'unmatched'
+
+
+def _start_request():
+    if request.endpoint == 'metrics.export':
+        return
+    g.metrics_started = time.perf_counter()
+    IN_FLIGHT.labels(_endpoint()).inc()
+
+
+def _finish_request(response):
+    started = g.get('metrics_started')
+    if started is not None:
+        REQUEST_SECONDS.labels(_endpoint(), request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(_endpoint(), request.method, response.status_code).inc()
+    return response
+
+
+def _leave_request(exc=None):
+    if g.pop('metrics_started', None) is not None:
+        IN_FLIGHT.labels(_endpoint()).dec()
+
+
+def observe_pools(exc=None):
+    """Copy the connection pool stats of this process into the pool metrics."""
+    global _pool_seen, _pool_seen_pid
+    from ..models.database import get_pool, get_replica_pool
+    if _pool_seen_pid != os.getpid():
+        _pool_seen = {}
+        _pool_seen_pid = os.getpid()
+    for name, pool in (('primary', get_pool()), ('replica', get_replica_pool())):
+        if pool is None:
+            continue
+        stats = pool.stats()
+        for state in POOL_STATES:
+            POOL_CONNECTIONS.labels(name, state).set(stats[state])
+        for event in POOL_COUNTERS + ('wait_seconds',):
+            seen = _pool_seen.get((name, event), 0)
+            if stats[event] > seen:
+                if event == 'wait_seconds':
+                    POOL_WAIT_SECONDS.labels(name).inc(stats[event] - seen)
+                else:
+                    POOL_EVENTS.labels(name, event).inc(stats[event] - seen)
+            _pool_seen[(name, event)] = stats[event]
+
+
+def render():
+    """Return ``(body, content type)`` for all workers' metrics combined."""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Drop a dead worker's live gauges; called from the gunicorn child_exit hook."""
+    multiprocess.mark_process_dead(pid)
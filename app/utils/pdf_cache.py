@@ -0,0 +1,74 @@
+import glob
+import hashlib
+import os
+from functools import lru_cache
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                             'templates', 'billing', 'bill_pdf.html')
+
+
+@lru_cache(maxsize=1)
+def template_version():
+    """Hash of the single-bill PDF template; a template edit changes every key."""
+    with open(TEMPLATE_PATH, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def _path(cache_dir, bill_id):
+    return os.path.join(cache_dir, f'bill_{bill_id}_{template_version()}.pdf')
+
+
+def get(cache_dir, bill_id):
+    """Return the cached PDF path for ``bill_id`` or None on a miss."""
+    path = _path(cache_dir, bill_id)
+    try:
+        # Bump the mtime so eviction treats the entry as recently used
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def put(cache_dir, bill_id, pdf, max_bytes):
+    """Store rendered PDF bytes for ``bill_id`` and return the cached path."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _path(cache_dir, bill_id)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(pdf)
+    # Atomic rename so other workers never see a partially written file
+    os.replace(tmp_path, path)
+    evict(cache_dir, max_bytes)
+    return path
+
+
+def invalidate(cache_dir, bill_id):
+    """Remove every cached rendering of ``bill_id``."""
+    for path in glob.glob(os.path.join(cache_dir, f'bill_{bill_id}_*.pdf')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def evict(cache_dir, max_bytes):
+    """Delete least recently used entries until the cache fits in ``max_bytes``."""
+    entries = []
+    total = 0
+    for path in glob.glob(os.path.join(cache_dir, 'bill_*.pdf')):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
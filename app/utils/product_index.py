@@ -0,0 +1,222 @@
+import time
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from heapq import nsmallest
+from threading import Lock, Thread
+from ..models.products import like_prefix
+
+PRODUCT_COLUMNS = '''id, name, CAST(price AS DECIMAL(10,2)) as price, quantity, expiry_date,
+                     is_scheduled, schedule_type, updated_at'''
+# Delta sync, served by idx_products_updated_at
+SYNC_QUERY = f'SELECT {PRODUCT_COLUMNS} FROM products WHERE updated_at >= %s'
+# Shorter queries match name prefixes, longer ones anywhere in the name
+MIN_SUBSTRING_LENGTH = 3
+# Before the first row is synced, when the catalog was loaded empty
+EPOCH = datetime(1970, 1, 1)
+
+
+def like_pattern(query):
+    """Return the ``name LIKE`` pattern that matches what ``search`` matches."""
+    key = query.strip()
+    if len(key) >= MIN_SUBSTRING_LENGTH:
+        return '%' + like_prefix(key)
+    return like_prefix(key)
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Product:
+    """Compact per-product record; slots keep 500k SKUs affordable per worker."""
+    __slots__ = ('id', 'name', 'key', 'price', 'quantity', 'expiry_date',
+                 'is_scheduled', 'schedule_category')
+
+    def __init__(self, row):
+        self.id = row['id']
+        self.name = row['name']
+        self.key = row['name'].lower()
+        self.price = float(row['price'])
+        self.quantity = row['quantity']
+        self.expiry_date = row['expiry_date']
+        self.is_scheduled = row['is_scheduled']
+        self.schedule_category = row['schedule_type']
+
+
+class _Snapshot:
+    """Name-ordered structures built by a full load and never mutated after."""
+    def __init__(self, entries):
+        ordered = sorted(entries.values(), key=lambda entry: (entry.key, entry.id))
+        self.names = [entry.key for entry in ordered]
+        self.ids = array('i', (entry.id for entry in ordered))
+        postings = {}
+        for entry in ordered:
+            for gram in _trigrams(entry.key):
+                postings.setdefault(gram, array('i')).append(entry.id)
+        self.postings = postings
+
+
+class ProductIndex:
+    """Per-process typeahead index over the product catalog.
+
+    A full load builds name-ordered trigram postings so substring queries
+    walk the shortest posting list and stop after ``limit`` sellable hits.
+    Products added or renamed since the last full load live in a small
+    ``_recent`` set that is scanned on every query. Stock and expiry are
+    checked at query time, so a sold-out product drops out of results as
+    soon as its row has been synced.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._entries = {}
+        self._snapshot = _Snapshot({})
+        self._recent = set()
+        self._watermark = None
+        self._loaded_at = 0
+        self._synced_at = 0
+        self._reloading = False
+
+    @property
+    def size(self):
+        return len(self._entries)
+
+    def _advance_watermark(self, row):
+        updated_at = row.get('updated_at')
+        if updated_at and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+
+    def load(self, rows):
+        """Replace the whole index with ``rows`` from the products table."""
+        entries = {}
+        for row in rows:
+            entries[row['id']] = _Product(row)
+            self._advance_watermark(row)
+        snapshot = _Snapshot(entries)
+        with self._lock:
+            self._entries = entries
+            self._snapshot = snapshot
+            self._recent = set()
+            self._loaded_at = self._synced_at = time.monotonic()
+
+    def upsert(self, row):
+        """Add or update a single product row."""
+        entry = _Product(row)
+        with self._lock:
+            previous = self._entries.get(entry.id)
+            if previous is None or previous.key != entry.key:
+                self._recent.add(entry.id)
+            self._entries[entry.id] = entry
+            self._advance_watermark(row)
+
+    def remove(self, product_id):
+        """Drop a deleted product."""
+        with self._lock:
+            self._entries.pop(product_id, None)
+            self._recent.discard(product_id)
+
+    def mark_stale(self):
+        """Force a sync before the next search, e.g. after a local write."""
+        self._synced_at = 0
+
+    def ensure_fresh(self, get_db, sync_interval, reload_interval, overlap=5):
+        """Pull changed rows or rebuild the index when it is due.
+
+        Changed rows are found through ``products.updated_at``; the overlap
+        re-reads rows stamped just before the watermark whose transaction
+        had not committed yet at the previous sync. Deletions made by other
+        workers are only picked up by the periodic full reload, which runs
+        in a background thread while the current snapshot keeps serving.
+        """
+        now = time.monotonic()
+        # An empty catalog is loaded too; it just has no watermark yet
+        if not self._loaded_at:
+            self._reload(get_db)
+            return
+        if now - self._loaded_at >= reload_interval and not self._reloading:
+            self._reloading = True
+            Thread(target=self._reload, args=(get_db,), daemon=True).start()
+        if now - self._synced_at < sync_interval:
+            return
+        with get_db() as conn:
+            cursor = conn.cursor(dictionary=True)
+            since = self._watermark - timedelta(seconds=overlap) if self._watermark else EPOCH
+            cursor.execute(SYNC_QUERY, (since,))
+            for row in cursor.fetchall():
+                self.upsert(row)
+        self._synced_at = now
+
+    def _reload(self, get_db):
+        try:
+            with get_db() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(f'SELECT {PRODUCT_COLUMNS} FROM products')
+                rows = cursor.fetchall()
+            self.load(rows)
+        finally:
+            self._reloading = False
+
+    def _sellable(self, entry, today):
+        return entry.quantity > 0 and entry.expiry_date is not None and entry.expiry_date > today
+
+    def search(self, query, limit=10, today=None):
+        """Return up to ``limit`` sellable products matching ``query`` by name.
+
+        Queries of three or more characters match anywhere in the name;
+        shorter ones match name prefixes. The SQL fallback matches the same
+        through ``like_pattern``; descriptions are not searched.
+        """
+        key = query.strip().lower()
+        if not key:
+            return []
+        today = today or date.today()
+        snapshot = self._snapshot
+        entries = self._entries
+        recent = self._recent
+
+        if len(key) >= MIN_SUBSTRING_LENGTH:
+            grams = [snapshot.postings.get(gram) for gram in _trigrams(key)]
+            candidates = () if any(ids is None for ids in grams) else min(grams, key=len)
+            matches = lambda entry: key in entry.key
+        else:
+            start = bisect_left(snapshot.names, key)
+            candidates = self._prefix_ids(snapshot, key, start)
+            matches = lambda entry: entry.key.startswith(key)
+
+        # Snapshot candidates arrive in name order, so stop at ``limit`` hits
+        found = []
+        seen = set()
+        for product_id in candidates:
+            if len(found) >= limit:
+                break
+            entry = entries.get(product_id)
+            if (entry is None or product_id in recent or product_id in seen
+                    or not matches(entry) or not self._sellable(entry, today)):
+                continue
+            seen.add(product_id)
+            found.append(entry)
+
+        for product_id in list(recent):
+            entry = entries.get(product_id)
+            if entry and product_id not in seen and matches(entry) and self._sellable(entry, today):
+                found.append(entry)
+
+        return [{
+            'id': entry.id,
+            'name': entry.name,
+            'price': entry.price,
+            'quantity': entry.quantity,
+            'is_scheduled': entry.is_scheduled,
+            'schedule_category': entry.schedule_category,
+        } for entry in nsmallest(limit, found, key=lambda entry: (entry.key, entry.id))]
+
+    @staticmethod
+    def _prefix_ids(snapshot, key, start):
+        for position in range(start, len(snapshot.names)):
+            if not snapshot.names[position].startswith(key):
+                return
+            yield snapshot.ids[position]
+
+
+# One index per worker process
+product_index = ProductIndex()
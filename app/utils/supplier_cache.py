@@ -0,0 +1,53 @@
+from threading import Lock
+from uuid import uuid4
+from .. import cache
+
+SUPPLIER_VERSION_KEY = 'suppliers:version'
+SUPPLIER_CHOICES_QUERY = 'SELECT id, name FROM suppliers ORDER BY name'
+
+_lock = Lock()
+_choices = {'version': None, 'items': []}
+
+
+def supplier_version():
+    """Return the current supplier table version from the shared cache."""
+    version = cache.get(SUPPLIER_VERSION_KEY)
+    if version is None:
+        # First use after a cache flush; add() keeps a concurrent bump
+        cache.add(SUPPLIER_VERSION_KEY, uuid4().hex, timeout=0)
+        version = cache.get(SUPPLIER_VERSION_KEY)
+    return version
+
+
+def bump_supplier_version():
+    """Mark every worker's cached supplier choices stale after a supplier write."""
+    try:
+        cache.set(SUPPLIER_VERSION_KEY, uuid4().hex, timeout=0)
+    except Exception as e:
+        print(f"Error bumping supplier version: {e}")
+
+
+def supplier_choices(get_db):
+    """Return ``[(id, name)]`` for all suppliers, cached per process by table version.
+
+    The version is read before the suppliers are, so a bump that lands
+    while the list is being loaded leaves it tagged with the old version
+    and the next call reloads it.
+    """
+    try:
+        version = supplier_version()
+    except Exception as e:
+        print(f"Error reading supplier version: {e}")
+        version = None
+    if version is not None and _choices['version'] == version:
+        return _choices['items']
+
+    with get_db() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(SUPPLIER_CHOICES_QUERY)
+        items = [(s['id'], s['name']) for s in cursor.fetchall()]
+    if version is not None:
+        with _lock:
+            _choices['version'] = version
+            _choices['items'] = items
+    return items
@@ -0,0 +1,172 @@
+"""Compare the legacy per-item checkout with the set-based ``create_bill``.
+
+Runs against the database configured through the usual ``DB_*`` environment
+variables. Scratch products are created with plenty of stock and removed
+together with the benchmark bills afterwards, and the daily_sales rollup
+is rebuilt for the days the benchmark billed on.
+
+    python benchmarks/bench_checkout.py --sizes 1 5 10 30 60 --iterations 50
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import mysql.connector
+
+from app.config import Config
+from app.models.bills import create_bill
+from app.models.sales import rebuild_daily_sales
+
+
+class CountingConnection:
+    """Connection proxy that counts client/server round trips."""
+    def __init__(self, conn):
+        self._conn = conn
+        self.round_trips = 0
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conn.cursor(*args, **kwargs)
+        execute = cursor.execute
+
+        def counted_execute(*a, **kw):
+            self.round_trips += 1
+            return execute(*a, **kw)
+
+        cursor.execute = counted_execute
+        return cursor
+
+    def start_transaction(self, *args, **kwargs):
+        self.round_trips += 1
+        return self._conn.start_transaction(*args, **kwargs)
+
+    def commit(self):
+        self.round_trips += 1
+        return self._conn.commit()
+
+    def rollback(self):
+        self.round_trips += 1
+        return self._conn.rollback()
+
+
+def legacy_create_bill(conn, customer_name, customer_phone, customer_email,
+                       payment_method, created_by, items):
+    """The per-item checkout that ``billing.new_bill`` used to run."""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute('''INSERT INTO bills
+                (customer_name, customer_phone, customer_email,
+                 total_amount, bill_date, payment_method, created_by)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)''',
+             (customer_name, customer_phone, customer_email, 0,
+              datetime.now(), payment_method, created_by))
+    bill_id = cursor.lastrowid
+    total_amount = 0
+    for item in items:
+        cursor.execute('SELECT price, quantity FROM products WHERE id = %s', (item['id'],))
+        product = cursor.fetchone()
+        cursor.execute('UPDATE products SET quantity = quantity - %s WHERE id = %s',
+                       (item['quantity'], item['id']))
+        cursor.execute('''INSERT INTO bill_items
+                    (bill_id, product_id, quantity, unit_price)
+                    VALUES (%s, %s, %s, %s)''',
+                 (bill_id, item['id'], item['quantity'], product['price']))
+        total_amount += product['price'] * item['quantity']
+    cursor.execute('UPDATE bills SET total_amount = %s WHERE id = %s',
+                   (total_amount, bill_id))
+    return bill_id
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def seed_products(conn, count):
+    cursor = conn.cursor()
+    rows = ', '.join(['(%s, %s, %s, %s, %s)'] * count)
+    params = []
+    for i in range(count):
+        params.extend((f'bench-checkout-{i}', 1000000, 10, 9.99, '2099-12-31'))
+    cursor.execute(f'''INSERT INTO products
+                (name, quantity, min_quantity, price, expiry_date)
+                VALUES {rows}''', params)
+    conn.commit()
+    cursor.execute("SELECT id FROM products WHERE name LIKE 'bench-checkout-%' ORDER BY id")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def cleanup(conn, product_ids):
+    cursor = conn.cursor()
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    cursor.execute(f'''SELECT DISTINCT bill_id FROM bill_items
+                       WHERE product_id IN ({placeholders})''', product_ids)
+    bill_ids = [row[0] for row in cursor.fetchall()]
+    first_day = None
+    if bill_ids:
+        cursor.execute(f"SELECT MIN(bill_date) FROM bills WHERE id IN ({', '.join(['%s'] * len(bill_ids))})",
+                       bill_ids)
+        first_day = cursor.fetchone()[0].date()
+    cursor.execute(f'DELETE FROM bill_items WHERE product_id IN ({placeholders})', product_ids)
+    if bill_ids:
+        cursor.execute(f"DELETE FROM bills WHERE id IN ({', '.join(['%s'] * len(bill_ids))})",
+                       bill_ids)
+    cursor.execute(f'DELETE FROM products WHERE id IN ({placeholders})', product_ids)
+    conn.commit()
+    # create_bill added the benchmark bills to daily_sales; the legacy path did not
+    if first_day:
+        rebuild_daily_sales(conn, first_day)
+        conn.commit()
+
+
+def run(conn, checkout, product_ids, size, iterations):
+    items = [{'id': product_id, 'quantity': 1} for product_id in product_ids[:size]]
+    timings = []
+    trips = 0
+    # One wrapper for the whole run: prepared statements are cached per
+    # connection object, so a new one each time would re-prepare every call
+    counting = CountingConnection(conn)
+    for _ in range(iterations):
+        counting.round_trips = 0
+        started = time.perf_counter()
+        try:
+            checkout(counting, 'Benchmark', None, None, 'cash', None, items)
+            counting.commit()
+        except Exception:
+            counting.rollback()
+            raise
+        timings.append((time.perf_counter() - started) * 1000)
+        trips = counting.round_trips
+    return trips, statistics.median(timings), percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 5, 10, 30, 60])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    config = dict(Config.DB_CONFIG)
+    config.pop('pool_name', None)
+    config.pop('pool_size', None)
+    conn = mysql.connector.connect(**config)
+    product_ids = seed_products(conn, max(args.sizes))
+    try:
+        print(f"{'items':>6} {'path':<10} {'trips':>6} {'p50 ms':>9} {'p95 ms':>9}")
+        for size in args.sizes:
+            for label, checkout in (('legacy', legacy_create_bill), ('set-based', create_bill)):
+                trips, p50, p95 = run(conn, checkout, product_ids, size, args.iterations)
+                print(f"{size:>6} {label:<10} {trips:>6} {p50:>9.2f} {p95:>9.2f}")
+    finally:
+        cleanup(conn, product_ids)
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark the prepared-statement registry against the text protocol.
+
+Runs each statement in ``app/models/statements.py`` through a plain
+``cursor(dictionary=True)`` and through its cached prepared cursor on one
+connection, and reports latency together with the server's per-call
+session counters: statements parsed (``Com_select`` for text,
+``Com_stmt_prepare`` for prepared) and bytes sent and received. Needs the
+database from the usual DB_* settings with some bills and products in it.
+
+    python benchmarks/bench_prepared_statements.py --repeat 2000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import mysql.connector
+
+from app.config import Config
+from app.models import statements
+from app.utils.product_index import like_pattern
+
+COUNTERS = ('Com_select', 'Com_stmt_prepare', 'Com_stmt_execute', 'Bytes_received', 'Bytes_sent')
+SEARCH_TERMS = ['para', 'amox', 'cillin', 'tab', 'syrup', 'xyzzy']
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))]
+
+
+def session_counters(conn):
+    cursor = conn.cursor()
+    cursor.execute(f"SHOW SESSION STATUS WHERE Variable_name IN ({', '.join(['%s'] * len(COUNTERS))})",
+                   COUNTERS)
+    counters = {name: int(value) for name, value in cursor.fetchall()}
+    cursor.close()
+    return counters
+
+
+def sample_params(conn, checkout_size):
+    cursor = conn.cursor()
+    cursor.execute('SELECT username FROM users ORDER BY id LIMIT 20')
+    usernames = [row[0] for row in cursor.fetchall()]
+    cursor.execute('SELECT id FROM bills ORDER BY id DESC LIMIT 100')
+    bill_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute('SELECT id FROM products ORDER BY id LIMIT 200')
+    product_ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    if not (usernames and bill_ids and len(product_ids) >= checkout_size):
+        sys.exit('Need users, bills and at least --checkout-size products to benchmark against')
+
+    checkouts = [sorted(product_ids[start:start + checkout_size])
+                 for start in range(0, len(product_ids) - checkout_size + 1, checkout_size)]
+    return {
+        'user_by_username': [(name,) for name in usernames],
+        'bill_by_id': [(bill_id,) for bill_id in bill_ids],
+        'bill_items_by_bill': [(bill_id,) for bill_id in bill_ids],
+        'product_search': [(like_pattern(term),) for term in SEARCH_TERMS],
+        'checkout_products': checkouts,
+    }
+
+
+def run(conn, name, params, repeat):
+    """Return per-call latencies in microseconds and per-call counter deltas."""
+    size = len(params[0]) if name == 'checkout_products' else None
+    # Warm up so the prepared path is measured after its one-off PREPARE
+    statements.fetch_all(conn, name, params[0], size=size)
+
+    before = session_counters(conn)
+    timings = []
+    for i in range(repeat):
+        values = params[i % len(params)]
+        if name == 'checkout_products':
+            conn.start_transaction()
+        started = time.perf_counter()
+        statements.fetch_all(conn, name, values, size=size)
+        timings.append((time.perf_counter() - started) * 1e6)
+        if name == 'checkout_products':
+            conn.rollback()
+    after = session_counters(conn)
+    # The closing SHOW STATUS is itself a select, and a bit of traffic
+    deltas = {counter: (after[counter] - before[counter]) / repeat for counter in COUNTERS}
+    return timings, deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=1000)
+    parser.add_argument('--checkout-size', type=int, default=5)
+    parser.add_argument('--statements', nargs='+', default=list(statements.STATEMENTS))
+    parser.add_argument('--pure', action='store_true', help='use the pure-Python connector')
+    args = parser.parse_args()
+
+    config = dict(Config.DB_CONFIG, use_pure=args.pure)
+    conn = mysql.connector.connect(**config)
+    params = sample_params(conn, args.checkout_size)
+
+    print(f"{'statement':<20} {'protocol':<9} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} "
+          f"{'parsed':>7} {'executes':>8} {'bytes in':>9} {'bytes out':>9}")
+    for name in args.statements:
+        for prepared in (False, True):
+            Config.PREPARED_STATEMENTS = prepared
+            timings, deltas = run(conn, name, params[name], args.repeat)
+            parsed = deltas['Com_stmt_prepare'] + deltas['Com_select']
+            print(f"{name:<20} {'binary' if prepared else 'text':<9} "
+                  f"{percentile(timings, 50):>9.1f} {percentile(timings, 95):>9.1f} "
+                  f"{percentile(timings, 99):>9.1f} {parsed:>7.2f} {deltas['Com_stmt_execute']:>8.2f} "
+                  f"{deltas['Bytes_received']:>9.0f} {deltas['Bytes_sent']:>9.0f}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark the in-memory product typeahead index against a linear scan.
+
+The linear scan mirrors what ``name LIKE '%q%'`` makes MySQL do without an
+index, minus the network and TEXT column overhead, so it flatters the old
+path. No database is needed.
+
+    python benchmarks/bench_product_search.py --sizes 10000 100000 500000
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.utils.product_index import ProductIndex
+
+PREFIXES = ['para', 'amox', 'azith', 'cefi', 'dolo', 'metf', 'panto', 'rani', 'cet',
+            'levo', 'ator', 'amlo', 'losa', 'omep', 'ibu', 'diclo', 'mont', 'vita']
+SUFFIXES = ['cillin', 'mycin', 'cetamol', 'zole', 'pril', 'sartan', 'statin', 'formin',
+            'tidine', 'profen', 'fenac', 'lukast', 'zine', 'xone', 'cal']
+FORMS = ['Tablet', 'Capsule', 'Syrup', 'Injection', 'Drops', 'Cream']
+QUERIES = ['p', 'am', 'para', 'cillin', 'tab', 'statin 20', 'zole cap', 'xyzzy', 'mycin 500']
+
+
+def synthetic_rows(count, seed=42):
+    rng = random.Random(seed)
+    today = date.today()
+    for product_id in range(1, count + 1):
+        name = (f"{rng.choice(PREFIXES).title()}{rng.choice(SUFFIXES)} "
+                f"{rng.choice([5, 10, 20, 250, 500, 650])} {rng.choice(FORMS)}")
+        yield {
+            'id': product_id,
+            'name': name,
+            'price': round(rng.uniform(5, 500), 2),
+            'quantity': rng.choice([0, 0, 5, 20, 100]),
+            'expiry_date': today + timedelta(days=rng.randint(-60, 720)),
+            'is_scheduled': rng.random() < 0.1,
+            'schedule_type': None,
+            'updated_at': datetime.now(),
+        }
+
+
+def linear_scan(rows, query, limit=10, today=None):
+    key = query.lower()
+    today = today or date.today()
+    hits = [row for row in rows
+            if key in row['name'].lower() and row['quantity'] > 0 and row['expiry_date'] > today]
+    return sorted(hits, key=lambda row: row['name'].lower())[:limit]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))]
+
+
+def time_queries(search, repeat):
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - started) * 1e6)
+    return percentile(timings, 50), percentile(timings, 95), percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000, 500000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--memory', action='store_true', help='also report index memory')
+    args = parser.parse_args()
+
+    print(f"{'SKUs':>8} {'build s':>8} {'mem MB':>8} {'path':<7} "
+          f"{'p50 us':>10} {'p95 us':>10} {'p99 us':>10}")
+    for size in args.sizes:
+        rows = list(synthetic_rows(size))
+
+        started = time.perf_counter()
+        index = ProductIndex()
+        index.load(rows)
+        build = time.perf_counter() - started
+
+        memory = float('nan')
+        if args.memory:
+            # Tracing slows the build down a lot, so measure it separately
+            tracemalloc.start()
+            traced = ProductIndex()
+            traced.load(rows)
+            memory = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+            tracemalloc.stop()
+
+        p50, p95, p99 = time_queries(index.search, args.repeat)
+        print(f"{size:>8} {build:>8.2f} {memory:>8.1f} {'index':<7} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f}")
+        p50, p95, p99 = time_queries(lambda query: linear_scan(rows, query), max(1, args.repeat // 10))
+        print(f"{size:>8} {'':>8} {'':>8} {'scan':<7} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""Benchmark the hot routes end to end against a throwaway MySQL database.
+
+Creates a scratch database (``--database``, dropped afterwards unless
+``--keep``) on the server from the usual ``DB_*`` settings, or on a
+disposable ``mysql:8.0`` container with ``--docker``. It migrates the
+database, seeds it from ``--seed`` with the ``flask generate-data``
+generator, boots ``create_app`` with rate limiting and CSRF off, and
+drives each route with logged-in test clients after a warm-up. It reports
+throughput and p50/p95/p99 per route.
+
+With ``--baseline`` the results are compared with a stored run. Any route
+whose p95 grew, or whose throughput fell, by more than ``--tolerance``
+fails the run with exit status 1, as does any error response.
+``--save-baseline`` writes the current run to that file instead.
+
+    python benchmarks/bench_routes.py --products 20000 --bills 50000 --save-baseline
+    python benchmarks/bench_routes.py --products 20000 --bills 50000 --baseline benchmarks/baseline_routes.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import mysql.connector
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_routes.json')
+
+SEARCH_TERMS = ['p', 'am', 'para', 'cillin', 'tab', 'statin 20', 'zole cap', 'xyzzy', 'mycin 500']
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_container(password):
+    """Start a disposable MySQL container and return ``(name, port)`` once it accepts logins."""
+    name = f'pharmacy-bench-{os.getpid()}'
+    port = free_port()
+    subprocess.run(['docker', 'run', '--rm', '-d', '--name', name, '-p', f'127.0.0.1:{port}:3306',
+                    '-e', f'MYSQL_ROOT_PASSWORD={password}', 'mysql:8.0'],
+                   check=True, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while True:
+        try:
+            mysql.connector.connect(host='127.0.0.1', port=port, user='root', password=password).close()
+            return name, port
+        except mysql.connector.Error:
+            if time.monotonic() > deadline:
+                subprocess.run(['docker', 'stop', name], stdout=subprocess.DEVNULL)
+                raise
+            time.sleep(1)
+
+
+def in_stock_products(conn):
+    """Return the ids of sellable products with stock to spare for checkouts."""
+    cursor = conn.cursor()
+    cursor.execute('''SELECT id FROM products
+                      WHERE quantity >= 500 AND expiry_date > CURDATE()
+                      ORDER BY id''')
+    return [row[0] for row in cursor.fetchall()]
+
+
+def routes(data, rng, pdf):
+    """Return ``{name: request factory}``; each factory returns ``(method, url, form)``."""
+    bill_ids = data['bill_ids']
+    unrendered = iter(reversed(bill_ids))
+
+    def checkout():
+        items = [{'id': product_id, 'quantity': 1}
+                 for product_id in rng.sample(data['in_stock'], rng.randint(1, 5))]
+        return 'POST', '/billing/new', {'customer_name': 'Bench Customer', 'customer_phone': '9000000000',
+                                        'customer_email': '', 'payment_method': 'cash',
+                                        'items': json.dumps(items)}
+
+    table = {
+        'dashboard': lambda: ('GET', '/', None),
+        'bills': lambda: ('GET', '/billing/', None),
+        'inventory': lambda: ('GET', '/inventory/', None),
+        'new_bill_form': lambda: ('GET', '/billing/new', None),
+        'checkout': checkout,
+        'search': lambda: ('GET', f'/billing/products/search?q={rng.choice(SEARCH_TERMS)}', None),
+        'view_bill': lambda: ('GET', f'/billing/bills/{rng.choice(bill_ids)}', None),
+    }
+    if pdf:
+        table['bill_pdf_cached'] = lambda: ('GET', f'/billing/bills/{bill_ids[0]}/pdf', None)
+        table['bill_pdf_render'] = lambda: ('GET', f'/billing/bills/{next(unrendered)}/pdf', None)
+    return table
+
+
+def logged_in_client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+        session['username'] = 'admin'
+        session['is_admin'] = True
+    return client
+
+
+def drive(app, make_request, requests, threads):
+    """Issue ``requests`` requests over ``threads`` clients; return timings, errors and wall time."""
+    timings, errors = [], []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker():
+        client = logged_in_client(app)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+                method, url, form = make_request()
+            started = time.perf_counter()
+            response = client.open(url, method=method, data=form)
+            elapsed = time.perf_counter() - started
+            # Handlers report failures by flashing and redirecting back to a listing
+            failed = response.status_code >= 400 or (
+                method == 'POST' and '/bills/' not in response.headers.get('Location', ''))
+            with lock:
+                timings.append(elapsed)
+                if failed:
+                    errors.append(f'{method} {url}: {response.status_code}')
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return timings, errors, time.perf_counter() - started
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions of ``results`` against ``baseline``."""
+    failures = []
+    for name, result in results.items():
+        base = baseline['routes'].get(name)
+        if base is None:
+            continue
+        if result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            failures.append(f"{name}: p95 {result['p95_ms']:.1f}ms vs baseline {base['p95_ms']:.1f}ms")
+        if result['rps'] < base['rps'] / (1 + tolerance):
+            failures.append(f"{name}: {result['rps']:.1f} req/s vs baseline {base['rps']:.1f} req/s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='pharmacy_bench')
+    parser.add_argument('--docker', action='store_true', help='run MySQL in a disposable container')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch database afterwards')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--suppliers', type=int, default=50)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--bills', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=20, help='untimed requests per route first')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--routes', nargs='+', help='only these routes')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+    # Relative to where the script was started, not the scratch directory below
+    for option in ('baseline', 'save_baseline'):
+        if getattr(args, option):
+            setattr(args, option, os.path.abspath(getattr(args, option)))
+
+    container = None
+    if args.docker:
+        os.environ['DB_PASSWORD'] = os.environ.get('DB_PASSWORD', 'bench')
+        container, port = start_container(os.environ['DB_PASSWORD'])
+        os.environ.update(DB_HOST='127.0.0.1', DB_PORT=str(port), DB_USER='root')
+    os.environ['DB_NAME'] = args.database
+
+    # Config resolves its directories at import time, so keep the app's
+    # cache, PDF, export and log files in a scratch directory
+    workdir = tempfile.mkdtemp(prefix='pharmacy-bench-')
+    os.chdir(workdir)
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(workdir, 'metrics_data'))
+    try:
+        from app import create_app
+        from app.config import Config
+        from app.models.database import get_db, get_pool
+        from app.models.datagen import generate
+        from app.models.schema import migrate
+        from app.utils.logging import activity_log_writer
+
+        server = dict(Config.DB_CONFIG)
+        server.pop('database')
+        # DROP DATABASE IF EXISTS notes a missing database (1008), which would raise
+        server.pop('raise_on_warnings', None)
+        admin = mysql.connector.connect(**server)
+        cursor = admin.cursor()
+        cursor.execute(f'DROP DATABASE IF EXISTS {args.database}')
+        cursor.execute(f'CREATE DATABASE {args.database}')
+
+        class BenchConfig(Config):
+            WTF_CSRF_ENABLED = False
+            RATELIMIT_ENABLED = False
+
+        app = create_app(BenchConfig)
+        rng = random.Random(args.seed)
+        started = time.perf_counter()
+        with app.app_context(), get_db() as conn:
+            migrate(conn, echo=lambda message: None)
+            created = generate(conn, args.suppliers, args.products, args.bills, seed=args.seed,
+                               echo=lambda message: None)
+            first_bill, last_bill = created['bills']
+            data = {'bill_ids': list(range(first_bill, last_bill + 1)),
+                    'in_stock': in_stock_products(conn)}
+        print(f"Seeded {args.products} products and {args.bills} bills in "
+              f"{time.perf_counter() - started:.1f}s")
+
+        pdf = shutil.which('wkhtmltopdf') is not None
+        if not pdf:
+            print("wkhtmltopdf not found, skipping the PDF routes")
+        table = routes(data, rng, pdf)
+        names = args.routes or list(table)
+
+        results = {}
+        print(f"{'route':<16} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'errors':>7}")
+        errors = []
+        for name in names:
+            drive(app, table[name], args.warmup, args.threads)
+            timings, route_errors, wall = drive(app, table[name], args.requests, args.threads)
+            results[name] = {
+                'requests': len(timings),
+                'rps': len(timings) / wall,
+                'p50_ms': percentile(timings, 50) * 1000,
+                'p95_ms': percentile(timings, 95) * 1000,
+                'p99_ms': percentile(timings, 99) * 1000,
+            }
+            errors.extend(f'{name}: {error}' for error in route_errors[:5])
+            result = results[name]
+            print(f"{name:<16} {result['requests']:>8} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} "
+                  f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {len(route_errors):>7}")
+
+        dataset = {key: getattr(args, key) for key in ('seed', 'suppliers', 'products', 'bills', 'threads')}
+        failures = [f'error response, {error}' for error in errors]
+        if args.save_baseline:
+            with open(args.save_baseline, 'w') as f:
+                json.dump({'dataset': dataset, 'routes': results}, f, indent=2)
+            print(f"Saved baseline to {args.save_baseline}")
+        elif args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            if baseline['dataset'] != dataset:
+                print(f"Warning: baseline was recorded with {baseline['dataset']}")
+            failures.extend(compare(results, baseline, args.tolerance))
+
+        # Let queued activity logs land and release the pooled connections first
+        activity_log_writer.close()
+        get_pool().close_all()
+        if not args.keep:
+            cursor.execute(f'DROP DATABASE IF EXISTS {args.database}')
+        admin.close()
+    finally:
+        os.chdir(project_root)
+        shutil.rmtree(workdir, ignore_errors=True)
+        if container:
+            subprocess.run(['docker', 'stop', container], stdout=subprocess.DEVNULL)
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("ok")
+
+
+if __name__ == '__main__':
+    main()
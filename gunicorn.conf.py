@@ -0,0 +1,17 @@
+import os
+import shutil
+
+from app.config import Config
+
+
+def on_starting(server):
+    """Clear metrics files left over from the previous run."""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR', Config.METRICS_DIR)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Stop counting a dead worker's in-flight requests and pool connections."""
+    from app.utils.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -0,0 +1,97 @@
+"""Plan checks for the production queries.
+
+The ``check_plan`` tests run on canned EXPLAIN rows. The production plan
+tests EXPLAIN every query in ``production_queries`` against the database
+from the usual DB_* settings. They are skipped unless DB_HOST is set, and
+need data seeded with ``flask generate-data`` so the plans are realistic.
+"""
+import os
+
+import pytest
+
+from app.models import query_plans
+from app.models.query_plans import SEEK, check_plan
+
+
+def plan_row(table, type, key, possible_keys=None, extra=None, rows=10):
+    return {'table': table, 'type': type, 'key': key, 'possible_keys': possible_keys or key,
+            'rows': rows, 'Extra': extra}
+
+
+class PlanCursor:
+    """Cursor returning a fixed EXPLAIN result."""
+    def __init__(self, plan):
+        self.plan = plan
+
+    def execute(self, sql, params=()):
+        assert sql.startswith('EXPLAIN ')
+
+    def fetchall(self):
+        return self.plan
+
+
+def problems(plan, index='idx_bills_bill_date', access=SEEK):
+    return check_plan(PlanCursor(plan), 'SELECT 1', (), 'bills', index, 'b', access)
+
+
+def test_index_seek_passes():
+    assert problems([plan_row('b', 'range', 'idx_bills_bill_date'),
+                     plan_row('u', 'eq_ref', 'PRIMARY')]) == []
+
+
+def test_other_key_fails_even_when_index_is_possible():
+    found = problems([plan_row('b', 'range', 'PRIMARY', 'idx_bills_bill_date,PRIMARY')])
+    assert found and 'instead of idx_bills_bill_date' in found[0]
+
+
+def test_full_scan_fails():
+    assert problems([plan_row('b', 'ALL', None, 'idx_bills_bill_date', rows=3)])
+
+
+def test_full_index_walk_fails_unless_allowed():
+    plan = [plan_row('b', 'index', 'idx_bills_bill_date')]
+    assert problems(plan)
+    assert problems(plan, access=SEEK + ('index',)) == []
+
+
+def test_full_scan_of_joined_table_fails():
+    found = problems([plan_row('b', 'range', 'idx_bills_bill_date'), plan_row('u', 'ALL', None)])
+    assert found == ['full scan of joined u (rows=10)']
+
+
+def test_no_matching_const_row_passes():
+    assert problems([plan_row(None, None, None, extra='no matching row in const table')],
+                    index='PRIMARY') == []
+
+
+def test_missing_table_fails():
+    assert problems([plan_row('x', 'ref', 'idx_bills_bill_date')])
+
+
+@pytest.fixture(scope='module')
+def conn():
+    if not os.environ.get('DB_HOST'):
+        pytest.skip('DB_HOST is not set')
+    import mysql.connector
+    from app.config import Config
+    try:
+        conn = mysql.connector.connect(**Config.DB_CONFIG)
+    except mysql.connector.Error as e:
+        pytest.skip(f'Database unavailable: {e}')
+    unseeded = query_plans.seed_problems(conn.cursor(dictionary=True))
+    if unseeded:
+        conn.close()
+        pytest.skip('; '.join(unseeded))
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope='module')
+def results(conn):
+    # raise_on_warnings stays on as in the app, so this covers EXPLAIN's note 1003
+    return dict(query_plans.check_production_plans(conn))
+
+
+@pytest.mark.parametrize('name', [query[0] for query in query_plans.production_queries()])
+def test_production_plan(results, name):
+    assert results[name] == []